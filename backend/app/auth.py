@@ -1,11 +1,17 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
-from app.database import get_session
+from app.database import engine
 from app.models import User
 
 # Secret key for JWT (in production, use env var)
@@ -13,16 +19,40 @@ SECRET_KEY = "supersecretkey"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Seconds a resolved user is reused before hitting the DB again
+USER_CACHE_TTL = float(os.environ.get("AUTH_USER_CACHE_TTL", "60"))
+# When true, the user is built from the signed token claims without any DB lookup.
+# Role changes and deletions then only take effect when the token expires.
+AUTH_TRUST_CLAIMS = os.environ.get("AUTH_TRUST_CLAIMS", "0") == "1"
+# Threads dedicated to argon2 hashing; argon2 releases the GIL while hashing
+AUTH_HASH_WORKERS = int(os.environ.get("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="argon2")
+
+_user_cache: Dict[str, Tuple[float, User]] = {}
+_user_cache_lock = threading.Lock()
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """
+    verify_password on the bounded hashing pool, keeping the event loop free.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -30,12 +60,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    # Ensure role is in data, or handle it elsewhere. 
+    # Ensure role is in data, or handle it elsewhere.
     # Ideally, data passed here should already contain 'role' if we want it in the token.
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+def invalidate_user_cache(username: str):
+    """
+    Call when a user's role changes or the user is deleted.
+    """
+    with _user_cache_lock:
+        _user_cache.pop(username, None)
+
+def _load_user(username: str) -> Optional[User]:
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == username)).first()
+        if user is None:
+            return None
+        # Detached copy without the password hash, safe to share between requests
+        return User(id=user.id, username=user.username, hashed_password="", role=user.role)
+
+async def _resolve_user(payload: dict) -> Optional[User]:
+    username = payload.get("sub")
+    if username is None:
+        return None
+
+    if AUTH_TRUST_CLAIMS and payload.get("uid") is not None and payload.get("role"):
+        return User(id=payload["uid"], username=username, hashed_password="", role=payload["role"])
+
+    now = time.monotonic()
+    with _user_cache_lock:
+        cached = _user_cache.get(username)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    user = await run_in_threadpool(_load_user, username)
+    if user is not None:
+        with _user_cache_lock:
+            _user_cache[username] = (now + USER_CACHE_TTL, user)
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -43,27 +108,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = session.exec(select(User).where(User.username == username)).first()
+
+    user = await _resolve_user(payload)
     if user is None:
         raise credentials_exception
     return user
 
-async def get_optional_current_user(token: Optional[str] = Depends(oauth2_scheme_optional), session: Session = Depends(get_session)) -> Optional[User]:
+async def get_optional_current_user(token: Optional[str] = Depends(oauth2_scheme_optional)) -> Optional[User]:
     if not token:
         return None
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
     except JWTError:
         return None
-    
-    user = session.exec(select(User).where(User.username == username)).first()
-    return user
+
+    return await _resolve_user(payload)
@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Max responses kept in the in-process LRU cache
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "512"))
+# Cache-Control for anonymous reads; s-maxage lets a CDN hold them longer than browsers
+PUBLIC_CACHE_CONTROL = os.environ.get("PUBLIC_CACHE_CONTROL", "public, max-age=30, s-maxage=300, stale-while-revalidate=60")
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Counters live in memory, so ETags carry the process start time to never
+# collide with ETags handed out before a restart.
+_epoch = int(time.time())
+_lock = threading.Lock()
+_list_version = 0
+_list_modified = float(_epoch)
+_article_versions: Dict[int, int] = {}
+_article_modified: Dict[int, float] = {}
+# Called with the article id after every invalidate_article (e.g. the static publisher)
+_article_listeners: List[Callable[[int], None]] = []
+
+class ResponseCache:
+    """
+    Thread-safe LRU of serialized JSON bodies with hit/miss counters.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Hashable, etag: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            # An entry built for an older version is as good as missing
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: Hashable, etag: str, body: bytes, headers: Dict[str, str]):
+        with self._lock:
+            self._entries[key] = (etag, body, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, predicate: Callable[[Hashable], bool]):
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+def invalidate_article(article_id: int):
+    """
+    Call after any write to an article (update, delete, regenerate, scrape).
+    Bumps the article and list versions and drops their cached responses.
+    """
+    global _list_version, _list_modified
+    now = time.time()
+    with _lock:
+        _article_versions[article_id] = _article_versions.get(article_id, 0) + 1
+        _article_modified[article_id] = now
+        _list_version += 1
+        _list_modified = now
+    response_cache.evict(lambda key: key[0] == "list" or key == ("article", article_id))
+    for listener in _article_listeners:
+        try:
+            listener(article_id)
+        except Exception as e:
+            print(f"Error in article invalidation listener: {e}")
+
+def on_article_invalidated(listener: Callable[[int], None]):
+    """
+    Registers a callback for article writes. It runs on the writer's thread,
+    so it should only queue work.
+    """
+    _article_listeners.append(listener)
+
+def invalidate_lists():
+    """
+    Call when articles are created, e.g. by ingestion.
+    """
+    global _list_version, _list_modified
+    with _lock:
+        _list_version += 1
+        _list_modified = time.time()
+    response_cache.evict(lambda key: key[0] == "list")
+
+def list_validators() -> Tuple[str, float]:
+    with _lock:
+        return f'W/"{_epoch}-l{_list_version}"', _list_modified
+
+def article_validators(article_id: int) -> Tuple[str, float]:
+    with _lock:
+        version = _article_versions.get(article_id, 0)
+        modified = _article_modified.get(article_id, float(_epoch))
+    return f'W/"{_epoch}-a{article_id}-v{version}"', modified
+
+def _not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def cached_json_response(request: Request, key: Hashable, validators: Tuple[str, float], build: Callable[[], Tuple[Any, Dict[str, str]]]) -> Response:
+    """
+    Serves an anonymous GET with ETag/Last-Modified revalidation (304) and the
+    in-process LRU cache. build() returns (content, extra_headers) on a miss,
+    or raises (e.g. a 404) if the resource can't be served.
+    """
+    etag, last_modified = validators
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": PUBLIC_CACHE_CONTROL,
+    }
+
+    # A cached entry for the current ETag proves the resource exists and is
+    # public; otherwise build() runs first so unknown or hidden ids still 404
+    # instead of answering a (possibly wildcard) validator with 304
+    cached = response_cache.get(key, etag)
+    if cached is None:
+        content, extra_headers = build()
+        body = json.dumps(jsonable_encoder(content), ensure_ascii=False).encode("utf-8")
+        response_cache.put(key, etag, body, extra_headers)
+    else:
+        body, extra_headers = cached
+
+    if _not_modified(request, etag, last_modified):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})
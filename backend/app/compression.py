@@ -0,0 +1,141 @@
+"""
+Transparent compression for large text columns (Article.content and
+original_content).
+
+Values are stored as BLOBs: zstd frames when the zstandard package is
+installed, zlib streams otherwise. Both are self-identifying, so readers
+handle either, plus uncompressed TEXT rows written before compression
+existed. Short values are stored as plain text, where compression gains
+nothing.
+
+zstd can use a dictionary trained on existing bodies
+(`python -m app.compression train`), which mainly helps short texts.
+Dictionaries are kept in COMPRESSION_DICT_DIR by their zstd dictionary id,
+which each frame records, so older rows stay readable after retraining.
+"""
+import os
+import sys
+import zlib
+from typing import Dict, Optional, Union
+from sqlalchemy.types import Text, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    print("WARNING: zstandard not installed, large text columns are compressed with zlib.")
+    zstandard = None
+
+# Values shorter than this (in UTF-8 bytes) are stored uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "256"))
+ZSTD_LEVEL = int(os.environ.get("ZSTD_LEVEL", "9"))
+COMPRESSION_DICT_DIR = os.environ.get("COMPRESSION_DICT_DIR", "zstd_dicts")
+# Compress new values with the most recently trained dictionary
+ZSTD_USE_DICTIONARY = os.environ.get("ZSTD_USE_DICTIONARY", "1") == "1"
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+_active_dict_id: Optional[int] = None
+_dictionaries_loaded = False
+
+def _load_dictionaries():
+    global _active_dict_id, _dictionaries_loaded
+    _dictionaries_loaded = True
+    if zstandard is None or not os.path.isdir(COMPRESSION_DICT_DIR):
+        return
+    newest = None
+    for name in os.listdir(COMPRESSION_DICT_DIR):
+        if not name.endswith(".dict"):
+            continue
+        path = os.path.join(COMPRESSION_DICT_DIR, name)
+        with open(path, "rb") as f:
+            dictionary = zstandard.ZstdCompressionDict(f.read())
+        _dictionaries[dictionary.dict_id()] = dictionary
+        mtime = os.path.getmtime(path)
+        if newest is None or mtime > newest[0]:
+            newest = (mtime, dictionary.dict_id())
+    _active_dict_id = newest[1] if newest else None
+
+def _dictionary(dict_id: Optional[int] = None):
+    if not _dictionaries_loaded:
+        _load_dictionaries()
+    if dict_id is None:
+        dict_id = _active_dict_id if ZSTD_USE_DICTIONARY else None
+    return _dictionaries.get(dict_id) if dict_id else None
+
+def compress_text(value: Optional[str]) -> Union[None, str, bytes]:
+    if value is None:
+        return None
+    raw = value.encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return value
+    if zstandard is not None:
+        dictionary = _dictionary()
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary) if dictionary else zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return compressor.compress(raw)
+    return zlib.compress(raw, 6)
+
+def decompress_text(value: Union[None, str, bytes]) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed text")
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        dictionary = _dictionary(dict_id) if dict_id else None
+        if dict_id and dictionary is None:
+            raise RuntimeError(f"Missing zstd dictionary {dict_id} in {COMPRESSION_DICT_DIR}")
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary) if dictionary else zstandard.ZstdDecompressor()
+        return decompressor.decompress(value).decode("utf-8")
+    return zlib.decompress(value).decode("utf-8")
+
+class CompressedText(TypeDecorator):
+    """
+    TEXT column stored compressed; reads and writes plain str.
+    SQLite's dynamic typing lets compressed BLOBs and legacy TEXT rows share the column.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+def train_dictionary(samples, size_kb: int = 112) -> int:
+    """
+    Trains a zstd dictionary on the given texts, saves it to
+    COMPRESSION_DICT_DIR and makes it the active one. Returns its id.
+    """
+    global _active_dict_id
+    if zstandard is None:
+        raise RuntimeError("zstandard is required to train a dictionary")
+    dictionary = zstandard.train_dictionary(size_kb * 1024, [s.encode("utf-8") for s in samples if s])
+    os.makedirs(COMPRESSION_DICT_DIR, exist_ok=True)
+    with open(os.path.join(COMPRESSION_DICT_DIR, f"{dictionary.dict_id()}.dict"), "wb") as f:
+        f.write(dictionary.as_bytes())
+    if not _dictionaries_loaded:
+        _load_dictionaries()
+    _dictionaries[dictionary.dict_id()] = dictionary
+    _active_dict_id = dictionary.dict_id()
+    return dictionary.dict_id()
+
+if __name__ == "__main__":
+    # python -m app.compression train [n_samples]
+    #   trains a dictionary on recent bodies; `python -m app.migrations recompress`
+    #   then rewrites existing rows with it
+    if len(sys.argv) > 1 and sys.argv[1] == "train":
+        from sqlmodel import Session, select
+        from app.database import engine
+        from app.models import Article
+
+        n_samples = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        with Session(engine) as session:
+            rows = session.exec(select(Article.content, Article.original_content).order_by(Article.id.desc()).limit(n_samples)).all()
+        samples = [text for row in rows for text in row if text]
+        dict_id = train_dictionary(samples)
+        print(f"Trained zstd dictionary {dict_id} on {len(samples)} samples")
+    else:
+        print("usage: python -m app.compression train [n_samples]")
@@ -1,14 +1,112 @@
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import SQLModel, create_engine, Session
+from app.metrics import stage_latency
 
-sqlite_file_name = "database.db"
+sqlite_file_name = os.environ.get("DATABASE_FILE", "database.db")
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+# SQLite tuning, overridable from the environment (.env)
+SQLITE_WAL = os.environ.get("SQLITE_WAL", "1") == "1"
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL") # Safe with WAL
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """
+    Per-connection tuning. WAL lets readers proceed while a writer commits;
+    synchronous=NORMAL only fsyncs at checkpoints; mmap and a larger page cache
+    keep hot pages out of read() syscalls.
+    """
+    cursor = dbapi_connection.cursor()
+    if SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stage_latency.observe(("db.query",), time.perf_counter() - conn.info["query_start"].pop())
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so it doesn't skew later timings on this pooled connection
+    conn = context.connection
+    if conn is not None and context.execution_context is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+def instrument_engine(target: Engine):
+    """
+    Times every statement into the db.query stage of GET /metrics.
+    """
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target, "handle_error", _handle_error)
+
+def build_engine(url: str = sqlite_url, tuned: bool = True) -> Engine:
+    """
+    Creates a pooled SQLite engine; tuned=False gives the plain default engine
+    (used as the baseline by benchmarks/bench_sqlite_concurrency.py).
+    """
+    connect_args = {"check_same_thread": False}
+    if not tuned:
+        return create_engine(url, connect_args=connect_args)
+
+    connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+    new_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+    event.listen(new_engine, "connect", apply_sqlite_pragmas)
+    instrument_engine(new_engine)
+    return new_engine
+
+engine = build_engine()
+
+# Optional async engine (aiosqlite) so async endpoints can query without
+# going through Starlette's threadpool.
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    import aiosqlite # noqa: F401
+
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{sqlite_file_name}",
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    instrument_engine(async_engine.sync_engine)
+except ImportError:
+    print("WARNING: aiosqlite not installed, async database sessions are disabled.")
+    async_engine = None
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    # create_all only creates missing tables; bring existing ones up to date
+    from app.migrations import run_migrations
+    run_migrations(engine)
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    if async_engine is None:
+        raise RuntimeError("Async sessions require aiosqlite (pip install aiosqlite)")
+    async with AsyncSession(async_engine) as session:
+        yield session
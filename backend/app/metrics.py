@@ -0,0 +1,137 @@
+"""
+Lightweight in-process instrumentation: per-route request latency and
+per-stage timings (SQLite queries, embedding, FAISS, scraping, Gemini),
+rendered in the Prometheus text exposition format at GET /metrics.
+
+    with stage("faiss.search"):
+        D, I = index.search(vectors, k)
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from fastapi import Request
+
+# Upper bounds in seconds, from sub-millisecond FAISS searches to slow Gemini calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram keyed by a tuple of label values.
+    Thread-safe: stages are timed from the event loop and from executor threads.
+    """
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List] = {} # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], seconds: float):
+        position = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if position < len(self.buckets):
+                series[0][position] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in sorted(self._series.items())]
+        for labels, counts, total, count in snapshot:
+            label_text = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, labels))
+            prefix = f"{label_text}," if label_text else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# ResponseCache.stats() keys that only ever increase
+CACHE_COUNTERS = {"hits", "misses", "not_modified"}
+
+request_latency = Histogram(
+    "raiz_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+stage_latency = Histogram(
+    "raiz_stage_duration_seconds", "Time spent in instrumented stages (db, embedding, faiss, scraper, llm).", ("stage",)
+)
+
+embedding_batch_size = Histogram(
+    "raiz_embedding_batch_size", "Texts per forward pass of the batching embedding executor.", (),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+llm_queue_wait = Histogram(
+    "raiz_llm_queue_wait_seconds", "Time Gemini calls waited for an admission slot, by priority class.", ("class",),
+    buckets=(0.005, 0.05, 0.25, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0),
+)
+
+@contextmanager
+def stage(name: str):
+    """
+    Times the enclosed block into raiz_stage_duration_seconds{stage=name}.
+    Also works around awaits, measuring wall time.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe((name,), time.perf_counter() - start)
+
+async def metrics_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = "500"
+    try:
+        response = await call_next(request)
+        status_code = str(response.status_code)
+        return response
+    finally:
+        # Label by route template (/articles/{article_id}), not the raw path,
+        # to keep the number of series bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        request_latency.observe((request.method, route_path, status_code), time.perf_counter() - start)
+
+def render_metrics() -> str:
+    from app.cache import response_cache
+    from app.services.admission import llm_admission
+    from app.services import events
+
+    lines = request_latency.render() + stage_latency.render() + embedding_batch_size.render() + llm_queue_wait.render()
+    for key, value in response_cache.stats().items():
+        if key in CACHE_COUNTERS:
+            lines.append(f"# TYPE raiz_response_cache_{key}_total counter")
+            lines.append(f"raiz_response_cache_{key}_total {value}")
+        else:
+            lines.append(f"# TYPE raiz_response_cache_{key} gauge")
+            lines.append(f"raiz_response_cache_{key} {value}")
+
+    event_stats = events.stats()
+    lines += [
+        "# TYPE raiz_event_subscribers gauge", f"raiz_event_subscribers {event_stats['subscribers']}",
+        "# TYPE raiz_events_published_total counter", f"raiz_events_published_total {event_stats['published']}",
+    ]
+
+    admission = llm_admission.stats()
+    lines += ["# TYPE raiz_llm_in_flight gauge", f"raiz_llm_in_flight {admission['in_flight']}"]
+    for metric, key, kind in (("queue_depth", "queued", "gauge"), ("admitted_total", "admitted", "counter")):
+        lines.append(f"# TYPE raiz_llm_{metric} {kind}")
+        lines += [f'raiz_llm_{metric}{{class="{name}"}} {c[key]}' for name, c in admission["classes"].items()]
+    lines.append("# TYPE raiz_llm_rejected_total counter")
+    for name, c in admission["classes"].items():
+        for code in (429, 503):
+            lines.append(f'raiz_llm_rejected_total{{class="{name}",status="{code}"}} {c[f"rejected_{code}"]}')
+    return "\n".join(lines) + "\n"
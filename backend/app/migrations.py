@@ -0,0 +1,157 @@
+"""
+Minimal schema migration tool for the SQLite database.
+
+SQLModel.metadata.create_all only creates missing tables, so changes to
+existing tables (indexes, columns, backfills) are registered here as numbered,
+idempotent steps. Applied versions are recorded in the schema_version table.
+
+    python -m app.migrations           # apply pending migrations
+    python -m app.migrations status    # show applied/pending migrations
+    python -m app.migrations recompress  # rewrite article bodies with the current zstd dictionary
+"""
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+def migration(version: int, description: str):
+    def register(fn: Callable[[Connection], None]):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description TEXT NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+def applied_versions(engine: Engine) -> set:
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Applies pending migrations in order, each in its own transaction.
+    Returns the versions applied.
+    """
+    done = applied_versions(engine)
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()},
+            )
+        print(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+# --- Migrations ---
+
+@migration(1, "Composite indexes on article for list and facet queries")
+def add_article_indexes(conn: Connection):
+    # Keep in sync with Article.__table_args__
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_article_status_published_at_id ON article (status, published_at, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_article_published_at_id ON article (published_at, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_article_source_published_at ON article (source, published_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_article_status_created_at ON article (status, created_at)"))
+
+@migration(2, "Backfill articletag from comma-separated Article.tags")
+def backfill_article_tags(conn: Connection):
+    from app.services.tags import normalize_tags
+
+    rows = conn.execute(text("SELECT id, tags FROM article WHERE tags IS NOT NULL AND tags != ''")).all()
+    for article_id, tags in rows:
+        for name in normalize_tags(tags):
+            conn.execute(text("INSERT OR IGNORE INTO tag (name) VALUES (:name)"), {"name": name})
+            conn.execute(
+                text("INSERT OR IGNORE INTO articletag (article_id, tag_id) SELECT :article_id, id FROM tag WHERE name = :name"),
+                {"article_id": article_id, "name": name},
+            )
+
+@migration(3, "Add article.scraped_at")
+def add_article_scraped_at(conn: Connection):
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(article)"))}
+    if "scraped_at" not in columns:
+        conn.execute(text("ALTER TABLE article ADD COLUMN scraped_at TIMESTAMP"))
+
+def recompress_article_bodies(conn: Connection, batch_size: int = 500, table: str = "article") -> int:
+    """
+    Rewrites content / original_content of article (or archivedarticle) with
+    the current codec (and zstd dictionary). Returns the number of rows changed.
+    """
+    from app.compression import compress_text, decompress_text
+
+    changed = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(f"SELECT id, content, original_content FROM {table} WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": batch_size},
+        ).all()
+        if not rows:
+            return changed
+        for article_id, content, original in rows:
+            new_content = compress_text(decompress_text(content))
+            new_original = compress_text(decompress_text(original))
+            if new_content != content or new_original != original:
+                conn.execute(
+                    text(f"UPDATE {table} SET content = :c, original_content = :o WHERE id = :id"),
+                    {"c": new_content, "o": new_original, "id": article_id},
+                )
+                changed += 1
+        last_id = rows[-1][0]
+
+@migration(4, "Compress article.content and original_content")
+def compress_article_bodies(conn: Connection):
+    changed = recompress_article_bodies(conn)
+    if changed:
+        # Freed pages are only returned to the filesystem by VACUUM
+        print(f"Compressed {changed} articles; run VACUUM to shrink the database file")
+
+@migration(5, "Rebuild article with AUTOINCREMENT so ids are never reused")
+def article_autoincrement(conn: Connection):
+    # Archived articles keep their id in archivedarticle (see
+    # app.services.archive); without AUTOINCREMENT SQLite hands the highest
+    # freed id to the next insert
+    from sqlalchemy.schema import CreateTable
+    from app.models import Article
+
+    current = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'article'")).scalar()
+    if current is None or "AUTOINCREMENT" in current.upper():
+        return
+    table = Article.__table__
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect)).replace("CREATE TABLE article ", "CREATE TABLE article_new ", 1)
+    columns = ", ".join(table.columns.keys())
+    # SQLite's table rebuild procedure: copy, drop, rename, recreate indexes
+    conn.execute(text(ddl))
+    conn.execute(text(f"INSERT INTO article_new ({columns}) SELECT {columns} FROM article"))
+    conn.execute(text("DROP TABLE article"))
+    conn.execute(text("ALTER TABLE article_new RENAME TO article"))
+    for index in table.indexes:
+        index.create(conn)
+
+if __name__ == "__main__":
+    from app.database import create_db_and_tables, engine
+
+    if len(sys.argv) > 1 and sys.argv[1] == "recompress":
+        # After training a new zstd dictionary (python -m app.compression train)
+        with engine.begin() as conn:
+            print(f"Recompressed {recompress_article_bodies(conn)} articles")
+            print(f"Recompressed {recompress_article_bodies(conn, table='archivedarticle')} archived articles")
+    elif len(sys.argv) > 1 and sys.argv[1] == "status":
+        done = applied_versions(engine)
+        for version, description, _ in MIGRATIONS:
+            print(f"[{'x' if version in done else ' '}] {version:03d} {description}")
+    else:
+        # create_db_and_tables creates new tables and then runs run_migrations
+        create_db_and_tables()
@@ -1,20 +1,56 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Column, Index, UniqueConstraint
 from sqlmodel import Field, SQLModel
+from app.compression import CompressedText
 
 class Article(SQLModel, table=True):
+    # Composite indexes for the list/facet query patterns. Existing databases
+    # get them through app.migrations, so keep the names in sync there.
+    __table_args__ = (
+        Index("ix_article_status_published_at_id", "status", "published_at", "id"),
+        Index("ix_article_published_at_id", "published_at", "id"),
+        Index("ix_article_source_published_at", "source", "published_at"),
+        Index("ix_article_status_created_at", "status", "created_at"),
+        # Ids are never reused, archived articles keep theirs in ArchivedArticle
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
-    content: str
+    content: str = Field(sa_column=Column(CompressedText, nullable=False)) # Stored compressed, see app.compression
     url: str = Field(unique=True)
     source: str
     published_at: Optional[datetime] = None
     summary: Optional[str] = None
-    original_content: Optional[str] = None # Stores the raw scraped text for reference
-    tags: Optional[str] = None # Comma-separated tags
+    original_content: Optional[str] = Field(default=None, sa_column=Column(CompressedText)) # Stores the raw scraped text for reference, compressed
+    scraped_at: Optional[datetime] = None # Set once the full page text replaced the RSS summary
+    tags: Optional[str] = None # Comma-separated tags, mirrored into ArticleTag
     status: str = Field(default="draft") # draft, published, archived
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ArchivedArticle(SQLModel, table=True):
+    # Cold tier: archived articles are moved here out of Article, keeping their
+    # id, so list queries and scans only touch the live set. Columns mirror
+    # Article; see app.services.archive.
+    __table_args__ = (
+        Index("ix_archivedarticle_published_at_id", "published_at", "id"),
+    )
+
+    id: int = Field(primary_key=True) # Same id the article had in Article
+    title: str
+    content: str = Field(sa_column=Column(CompressedText, nullable=False))
+    url: str = Field(unique=True)
+    source: str
+    published_at: Optional[datetime] = None
+    summary: Optional[str] = None
+    original_content: Optional[str] = Field(default=None, sa_column=Column(CompressedText))
+    scraped_at: Optional[datetime] = None
+    tags: Optional[str] = None
+    status: str = Field(default="archived")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
 class KnowledgeItem(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     content: str
@@ -42,3 +78,52 @@ class User(SQLModel, table=True):
     username: str = Field(index=True, unique=True)
     hashed_password: str
     role: str = Field(default="user") # 'admin' or 'user'
+
+class StoryCluster(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    article_id: int = Field(foreign_key="article.id", unique=True) # Canonical draft for the story
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class StoryClusterMember(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    cluster_id: int = Field(foreign_key="storycluster.id", index=True)
+    url: str = Field(unique=True) # Duplicate entry URL, skipped at ingestion
+    title: str
+    source: str
+    similarity: float
+    published_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class RelatedArticle(SQLModel, table=True):
+    article_id: int = Field(foreign_key="article.id", primary_key=True)
+    rank: int = Field(primary_key=True) # 0 = most similar
+    related_article_id: int = Field(foreign_key="article.id")
+    score: float # Cosine similarity
+
+class Tag(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(index=True, unique=True) # Normalized: stripped and lowercased
+
+class ArticleTag(SQLModel, table=True):
+    article_id: int = Field(foreign_key="article.id", primary_key=True)
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True, index=True)
+
+class KnowledgeItemTag(SQLModel, table=True):
+    item_id: int = Field(foreign_key="knowledgeitem.id", primary_key=True)
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True, index=True)
+
+class ArticleRevision(SQLModel, table=True):
+    # Revision history of an article's editable fields. Most rows are deltas
+    # against the previous revision; a full snapshot every few revisions
+    # bounds reconstruction cost. See app.services.revisions.
+    __table_args__ = (UniqueConstraint("article_id", "revision"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    article_id: int = Field(foreign_key="article.id", index=True)
+    revision: int # 1, 2, 3... per article
+    kind: str # "snapshot" or "delta"
+    action: str # original, edit, regenerate, scrape, restore
+    data: str = Field(sa_column=Column(CompressedText, nullable=False)) # JSON
+    author: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
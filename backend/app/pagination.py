@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlmodel import select
+from app.models import ArchivedArticle, Article, ArticleTag, Tag
+
+# Lightweight projection for dashboard/list views (no content bodies)
+ARTICLE_LIST_FIELDS = ["id", "title", "summary", "url", "source", "status", "tags", "published_at", "created_at"]
+ARTICLE_FIELDS = list(Article.__table__.columns.keys())
+# Compressed bodies, decompressed per row; only returned when fields= asks for them
+ARTICLE_BODY_FIELDS = ["content", "original_content"]
+ARTICLE_DEFAULT_FIELDS = [c for c in ARTICLE_FIELDS if c not in ARTICLE_BODY_FIELDS]
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Resolves the fields= query parameter into Article column names.
+    None means every column but the bodies (GET /articles/{id} serves those);
+    "list" is the lightweight list projection. Raises ValueError on unknown names.
+    """
+    if not fields:
+        return ARTICLE_DEFAULT_FIELDS
+    if fields == "list":
+        return ARTICLE_LIST_FIELDS
+
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [n for n in names if n not in ARTICLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned, clients need it to open the article
+    return ["id"] + [n for n in names if n != "id"]
+
+def encode_cursor(published_at: Optional[datetime], article_id: int) -> str:
+    payload = {"p": published_at.isoformat() if published_at else None, "i": article_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """
+    Raises ValueError on a malformed cursor.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        published_at = datetime.fromisoformat(payload["p"]) if payload["p"] else None
+        return published_at, int(payload["i"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def after_cursor(published_at: Optional[datetime], article_id: int, model=Article):
+    """
+    WHERE clause for the rows following the cursor in
+    ORDER BY published_at DESC, id DESC (SQLite sorts NULLs last in DESC).
+    """
+    if published_at is None:
+        return and_(model.published_at.is_(None), model.id < article_id)
+    return or_(
+        model.published_at < published_at,
+        and_(model.published_at == published_at, model.id < article_id),
+        model.published_at.is_(None),
+    )
+
+def _page_rows(session, model, status: str, limit: Optional[int], cursor: Optional[str], selected: List[str], tag: Optional[str]) -> List[dict]:
+    statement = select(*[getattr(model, c) for c in selected])
+    if status != "all":
+        statement = statement.where(model.status == status)
+    if tag:
+        tagged = select(ArticleTag.article_id).join(Tag, Tag.id == ArticleTag.tag_id).where(Tag.name == tag.strip().lower())
+        statement = statement.where(model.id.in_(tagged))
+
+    if cursor:
+        statement = statement.where(after_cursor(*decode_cursor(cursor), model=model))
+
+    statement = statement.order_by(model.published_at.desc(), model.id.desc())
+    if limit:
+        # One extra row tells us whether there is a next page
+        statement = statement.limit(limit + 1)
+
+    return [dict(row._mapping) for row in session.execute(statement).all()]
+
+def _sort_key(row: dict):
+    # published_at DESC with NULLs last, then id DESC, as in SQL (used with reverse=True)
+    return (row["published_at"] is not None, row["published_at"] or datetime.min, row["id"])
+
+def query_article_page(session, status: str, limit: Optional[int], cursor: Optional[str], columns: List[str], tag: Optional[str] = None, archived: bool = False, include_archived: bool = False) -> Tuple[List[dict], Optional[str]]:
+    """
+    Runs the GET /articles query, selecting only the given columns.
+    archived=True reads the cold tier (ArchivedArticle) instead of Article;
+    include_archived=True reads both tiers, merged in the same order.
+    Returns (rows, next_cursor); next_cursor is None on the last page or without limit.
+    Raises ValueError on a malformed cursor.
+    """
+    # Pagination and merging need the sort key of each row even if it wasn't requested
+    selected = columns + [c for c in ("published_at", "id") if (limit or include_archived) and c not in columns]
+    if include_archived:
+        rows = _page_rows(session, Article, status, limit, cursor, selected, tag)
+        rows += _page_rows(session, ArchivedArticle, status, limit, cursor, selected, tag)
+        rows.sort(key=_sort_key, reverse=True)
+        if limit:
+            rows = rows[:limit + 1]
+    else:
+        rows = _page_rows(session, ArchivedArticle if archived else Article, status, limit, cursor, selected, tag)
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["published_at"], rows[-1]["id"])
+
+    return [{c: row[c] for c in columns} for row in rows], next_cursor
@@ -0,0 +1,132 @@
+"""
+Opt-in sampling profiler for live hot-path profiling. While running, a
+background thread snapshots every thread's Python stack at a fixed interval
+(sys._current_frames), so the overhead is bounded by the sampling rate and
+nothing is traced when it is stopped.
+
+Disabled unless PROFILER_ENABLED=1; controlled through the admin-only
+/debug/profiler endpoints. Results are available as a top-functions summary
+or in collapsed-stack format for flamegraph.pl / speedscope.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+# A forgotten profiler stops itself after this long
+PROFILER_MAX_SECONDS = int(os.environ.get("PROFILER_MAX_SECONDS", "300"))
+
+# Leaf frames of threads that are parked rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+    ("core.py", "_connection_worker_thread"), # aiosqlite
+}
+
+def _collapse(frame) -> Optional[str]:
+    # "file:function;file:function;..." from the outermost to the innermost frame
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((os.path.basename(code.co_filename), code.co_name))
+        frame = frame.f_back
+    if not stack or stack[0] in IDLE_FRAMES:
+        return None
+    return ";".join(f"{filename}:{name}" for filename, name in reversed(stack))
+
+class SamplingProfiler:
+    def __init__(self):
+        self.samples: Counter = Counter()
+        self.interval = 0.005
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: float = 5.0):
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        with self._lock:
+            self.samples = Counter()
+            self.ticks = 0
+        self.interval = interval_ms / 1000
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        if self.started_at and not self.stopped_at:
+            self.stopped_at = time.time()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + PROFILER_MAX_SECONDS
+        while not self._stop.wait(self.interval):
+            if time.monotonic() > deadline:
+                break
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                self.ticks += 1
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    stack = _collapse(frame)
+                    if stack:
+                        self.samples[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def summary(self, limit: int = 25) -> dict:
+        """
+        Busy samples per innermost function (self time) and per function on
+        the stack (inclusive time), most sampled first.
+        """
+        self_time: Counter = Counter()
+        inclusive: Counter = Counter()
+        with self._lock:
+            total = sum(self.samples.values())
+            for stack, count in self.samples.items():
+                frames = stack.split(";")[1:] # Drop the thread name
+                self_time[frames[-1]] += count
+                for frame in set(frames):
+                    inclusive[frame] += count
+
+        def rows(counter: Counter) -> List[dict]:
+            return [
+                {"function": name, "samples": count, "percent": round(100 * count / total, 1)}
+                for name, count in counter.most_common(limit)
+            ]
+
+        end = self.stopped_at or time.time()
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "duration_seconds": round(end - self.started_at, 2) if self.started_at else 0.0,
+            "ticks": self.ticks,
+            "busy_samples": total,
+            "self": rows(self_time) if total else [],
+            "inclusive": rows(inclusive) if total else [],
+        }
+
+profiler = SamplingProfiler()
@@ -0,0 +1,238 @@
+"""
+Admission control for Gemini calls.
+
+Every call takes one of LLM_MAX_CONCURRENCY slots (the shared quota). When
+none is free the call waits in its class queue, and freed slots go to the
+highest-priority class first:
+
+    interactive   editor actions: regenerate, refine, audit
+    bulk          bulk regenerate jobs
+    ingestion     article generation during feed ingestion
+
+Background classes never take the last LLM_INTERACTIVE_RESERVED slots, so an
+editor is never stuck behind a full pool of ingestion calls. Overload is
+rejected up front instead of timing out later:
+
+    429  the class queue already holds its maximum number of waiters
+    503  the estimated wait (queue ahead x average call time) exceeds the
+         class's max wait, or the call actually waited that long
+
+Queue-wait time per class is exported at /metrics.
+
+    async with admit("interactive"):
+        response = await model.generate_content_async(prompt)
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, Optional
+from app.metrics import llm_queue_wait
+
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+# Slots the background classes leave free for interactive calls
+LLM_INTERACTIVE_RESERVED = int(os.environ.get("LLM_INTERACTIVE_RESERVED", "1"))
+# Seed for the average call duration used to estimate waits
+LLM_EXPECTED_CALL_SECONDS = float(os.environ.get("LLM_EXPECTED_CALL_SECONDS", "5"))
+
+# Highest priority first
+LLM_CLASSES = {
+    "interactive": {
+        "max_queue": int(os.environ.get("LLM_QUEUE_INTERACTIVE", "16")),
+        "max_wait": float(os.environ.get("LLM_MAX_WAIT_INTERACTIVE", "30")),
+    },
+    "bulk": {
+        "max_queue": int(os.environ.get("LLM_QUEUE_BULK", "256")),
+        "max_wait": float(os.environ.get("LLM_MAX_WAIT_BULK", "600")),
+    },
+    "ingestion": {
+        "max_queue": int(os.environ.get("LLM_QUEUE_INGESTION", "64")),
+        "max_wait": float(os.environ.get("LLM_MAX_WAIT_INGESTION", "900")),
+    },
+}
+
+class AdmissionRejected(Exception):
+    """
+    Raised instead of queueing when the LLM pool is overloaded; main.py turns
+    it into a 429/503 response with Retry-After.
+    """
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, round(retry_after))
+
+class _Waiter:
+    __slots__ = ("llm_class", "queued_at", "granted", "event", "future", "loop")
+
+    def __init__(self, llm_class: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.llm_class = llm_class
+        self.queued_at = time.perf_counter()
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+
+    def wake(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+        else:
+            self.event.set()
+
+class AdmissionController:
+    """
+    Priority slot pool usable from the event loop (acquire_async) and from
+    worker threads (acquire). Thread-safe.
+    """
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, reserved: int = LLM_INTERACTIVE_RESERVED, classes: Dict[str, dict] = LLM_CLASSES):
+        self.max_concurrency = max_concurrency
+        self.classes = classes
+        self.priority = list(classes)
+        # Slots each class may fill; background classes leave the reserve free
+        self.limits = {
+            name: max_concurrency if i == 0 else max(1, max_concurrency - reserved)
+            for i, name in enumerate(self.priority)
+        }
+        self.in_flight = 0
+        self.queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in classes}
+        self.average_call = LLM_EXPECTED_CALL_SECONDS
+        self.admitted = {name: 0 for name in classes}
+        self.rejected = {(name, code): 0 for name in classes for code in (429, 503)}
+        self._lock = threading.Lock()
+
+    def _estimated_wait(self, llm_class: str) -> float:
+        # Everyone queued at the same or higher priority goes first
+        rank = self.priority.index(llm_class)
+        ahead = sum(len(self.queues[name]) for name in self.priority[:rank + 1])
+        return (ahead + 1) * self.average_call / self.limits[llm_class]
+
+    def _reject(self, llm_class: str, status_code: int, detail: str, retry_after: float):
+        self.rejected[(llm_class, status_code)] += 1
+        return AdmissionRejected(status_code, detail, retry_after)
+
+    def _enter(self, llm_class: str, loop=None) -> Optional[_Waiter]:
+        """
+        Takes a slot (returns None) or enqueues a waiter. Raises
+        AdmissionRejected when overloaded. Caller holds the lock.
+        """
+        if llm_class not in self.classes:
+            raise ValueError(f"Unknown LLM class {llm_class!r}")
+        limits = self.classes[llm_class]
+        queue = self.queues[llm_class]
+        if not queue and self.in_flight < self.limits[llm_class]:
+            self.in_flight += 1
+            self.admitted[llm_class] += 1
+            return None
+        estimate = self._estimated_wait(llm_class)
+        if len(queue) >= limits["max_queue"]:
+            raise self._reject(llm_class, 429, f"Too many queued {llm_class} LLM requests, retry later", estimate)
+        if estimate > limits["max_wait"]:
+            raise self._reject(llm_class, 503, f"LLM service overloaded (estimated wait {estimate:.0f}s)", estimate)
+        waiter = _Waiter(llm_class, loop)
+        queue.append(waiter)
+        return waiter
+
+    def _dispatch(self):
+        # Hands free slots to waiters, highest priority first. Caller holds the lock.
+        for name in self.priority:
+            queue = self.queues[name]
+            while queue and self.in_flight < self.limits[name]:
+                waiter = queue.popleft()
+                waiter.granted = True
+                self.in_flight += 1
+                self.admitted[name] += 1
+                waiter.wake()
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """
+        Removes a waiter that gave up. False if it was granted a slot meanwhile.
+        """
+        with self._lock:
+            if waiter.granted:
+                return False
+            self.queues[waiter.llm_class].remove(waiter)
+            return True
+
+    def _timed_out(self, waiter: _Waiter) -> AdmissionRejected:
+        with self._lock:
+            return self._reject(waiter.llm_class, 503, "LLM service overloaded, timed out waiting", self._estimated_wait(waiter.llm_class))
+
+    def _waited(self, waiter: Optional[_Waiter], llm_class: str):
+        llm_queue_wait.observe((llm_class,), time.perf_counter() - waiter.queued_at if waiter else 0.0)
+
+    async def acquire_async(self, llm_class: str):
+        with self._lock:
+            waiter = self._enter(llm_class, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.classes[llm_class]["max_wait"])
+            except asyncio.TimeoutError:
+                if self._abandon(waiter):
+                    raise self._timed_out(waiter)
+            except asyncio.CancelledError:
+                # Client went away: give up the place, or the slot if it arrived
+                if not self._abandon(waiter):
+                    self.release()
+                raise
+        self._waited(waiter, llm_class)
+
+    def acquire(self, llm_class: str):
+        with self._lock:
+            waiter = self._enter(llm_class)
+        if waiter is not None:
+            if not waiter.event.wait(timeout=self.classes[llm_class]["max_wait"]) and self._abandon(waiter):
+                raise self._timed_out(waiter)
+        self._waited(waiter, llm_class)
+
+    def release(self, call_seconds: Optional[float] = None):
+        with self._lock:
+            self.in_flight -= 1
+            if call_seconds is not None:
+                self.average_call = 0.8 * self.average_call + 0.2 * call_seconds
+            self._dispatch()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "average_call_seconds": round(self.average_call, 2),
+                "classes": {
+                    name: {
+                        "queued": len(self.queues[name]),
+                        "slot_limit": self.limits[name],
+                        "admitted": self.admitted[name],
+                        "rejected_429": self.rejected[(name, 429)],
+                        "rejected_503": self.rejected[(name, 503)],
+                    }
+                    for name in self.priority
+                },
+            }
+
+llm_admission = AdmissionController()
+
+@asynccontextmanager
+async def admit(llm_class: str):
+    """
+    Holds an LLM slot for the enclosed call, from the event loop.
+    """
+    await llm_admission.acquire_async(llm_class)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        llm_admission.release(time.perf_counter() - start)
+
+@contextmanager
+def admit_sync(llm_class: str):
+    """
+    Holds an LLM slot for the enclosed call, from a worker thread.
+    """
+    llm_admission.acquire(llm_class)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        llm_admission.release(time.perf_counter() - start)
@@ -0,0 +1,86 @@
+"""
+Hot/cold tiering of archived articles.
+
+Archiving an article moves its row from Article to ArchivedArticle (same id,
+bodies copied still compressed) and its vector from the live FAISS index to
+the archive index, so list queries, scans, search and related-article lists
+only deal with the live set. Restoring moves both back. Tags and revision
+history stay keyed by article id and are untouched.
+
+Archived articles are read through the explicit archived=true flag of
+GET /articles, GET /articles/{id} and GET /search; GET /articles also takes
+status=archived and merges both tiers for status=all. PUT /articles/{id}
+and the revision endpoints accept archived ids.
+
+    python -m app.services.archive     # move rows/vectors left in the hot tier
+"""
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import delete, insert, literal, or_
+from sqlmodel import Session, select
+from app.database import engine
+from app.models import ArchivedArticle, Article, RelatedArticle
+from app.services import rag
+from app.services.related import refresh_related_for
+
+ARTICLE_COLUMNS = list(Article.__table__.columns.keys())
+
+def archive_articles(session: Session, article_ids: List[int]) -> List[int]:
+    """
+    Moves live articles to the cold tier with status "archived". Does not
+    commit; after committing, call rag.archive_vectors with the returned ids.
+    """
+    ids = list(session.execute(select(Article.id).where(Article.id.in_(article_ids))).scalars().all())
+    if not ids:
+        return []
+    columns = [literal("archived") if c == "status" else getattr(Article, c) for c in ARTICLE_COLUMNS]
+    session.execute(
+        insert(ArchivedArticle).from_select(
+            ARTICLE_COLUMNS + ["archived_at"],
+            select(*columns, literal(datetime.utcnow())).where(Article.id.in_(ids)),
+        )
+    )
+    # Neighbour lists are rebuilt from the live index only
+    session.execute(delete(RelatedArticle).where(or_(RelatedArticle.article_id.in_(ids), RelatedArticle.related_article_id.in_(ids))))
+    session.execute(delete(Article).where(Article.id.in_(ids)))
+    return ids
+
+def restore_articles(session: Session, article_ids: List[int], status: str = "draft") -> List[int]:
+    """
+    Moves archived articles back to the live table with the given status.
+    Does not commit; after committing, call restore_vectors with the returned ids.
+    """
+    ids = list(session.execute(select(ArchivedArticle.id).where(ArchivedArticle.id.in_(article_ids))).scalars().all())
+    if not ids:
+        return []
+    columns = [literal(status) if c == "status" else getattr(ArchivedArticle, c) for c in ARTICLE_COLUMNS]
+    session.execute(insert(Article).from_select(ARTICLE_COLUMNS, select(*columns).where(ArchivedArticle.id.in_(ids))))
+    session.execute(delete(ArchivedArticle).where(ArchivedArticle.id.in_(ids)))
+    return ids
+
+def restore_vectors(article_ids: List[int]):
+    """
+    Moves the vectors of restored articles back to the live index and
+    recomputes their neighbour lists.
+    """
+    rag.unarchive_vectors(article_ids)
+    for article_id in article_ids:
+        refresh_related_for(article_id)
+
+def sweep() -> Tuple[int, int]:
+    """
+    Moves archived rows still in the hot table (archived before tiering
+    existed) and archived vectors still in the live index.
+    Returns (rows moved, vectors moved).
+    """
+    with Session(engine) as session:
+        hot_archived = list(session.exec(select(Article.id).where(Article.status == "archived")).all())
+        moved = archive_articles(session, hot_archived) if hot_archived else []
+        session.commit()
+        archived_ids = session.exec(select(ArchivedArticle.id)).all()
+    vectors = rag.archive_vectors(archived_ids) if archived_ids else 0
+    return len(moved), vectors
+
+if __name__ == "__main__":
+    rows, vectors = sweep()
+    print(f"Moved {rows} archived article(s) and {vectors} vector(s) to the archive tier")
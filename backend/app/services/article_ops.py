@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import delete, or_
+from sqlmodel import Session, select
+from app.models import ArchivedArticle, Article, ArticleRevision, ArticleTag, RelatedArticle, StoryCluster, StoryClusterMember
+
+ARTICLE_STATUSES = ["draft", "published", "archived"]
+
+def _summary_from(text: str) -> str:
+    # Generate a better summary or just truncate without "..." if short
+    if len(text) > 200:
+        return text[:200] + "..."
+    return text
+
+def apply_generated(article: Article, generated_data: dict):
+    """
+    Writes a generate_article_content result onto the article.
+    """
+    article.title = generated_data['title']
+    article.content = generated_data['content']
+    # Ideally, the LLM should also return a summary
+    article.summary = _summary_from(generated_data['content'])
+
+def apply_scraped(article: Article, scraped_text: str):
+    """
+    Writes scraped page text onto the article.
+    """
+    article.content = scraped_text
+    article.original_content = scraped_text # Save original for reference
+    # Also update summary so the UI card reflects the change
+    article.summary = _summary_from(scraped_text)
+    article.scraped_at = datetime.utcnow()
+
+def delete_articles(session: Session, article_ids: List[int]) -> List[int]:
+    """
+    Deletes the articles, live or archived, and their dependent rows (related
+    lists, tags, story clusters, revision history). Does not commit; the
+    caller owns the transaction. Returns the ids that existed.
+    """
+    existing = list(session.execute(select(Article.id).where(Article.id.in_(article_ids))).scalars().all())
+    existing += session.execute(select(ArchivedArticle.id).where(ArchivedArticle.id.in_(article_ids))).scalars().all()
+    if not existing:
+        return []
+
+    session.execute(delete(RelatedArticle).where(or_(RelatedArticle.article_id.in_(existing), RelatedArticle.related_article_id.in_(existing))))
+    session.execute(delete(ArticleTag).where(ArticleTag.article_id.in_(existing)))
+    session.execute(delete(ArticleRevision).where(ArticleRevision.article_id.in_(existing)))
+    cluster_ids = select(StoryCluster.id).where(StoryCluster.article_id.in_(existing))
+    session.execute(delete(StoryClusterMember).where(StoryClusterMember.cluster_id.in_(cluster_ids)))
+    session.execute(delete(StoryCluster).where(StoryCluster.article_id.in_(existing)))
+    session.execute(delete(Article).where(Article.id.in_(existing)))
+    session.execute(delete(ArchivedArticle).where(ArchivedArticle.id.in_(existing)))
+    return existing
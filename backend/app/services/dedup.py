@@ -0,0 +1,131 @@
+import faiss
+import numpy as np
+import pickle
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlmodel import Session, select
+from app.metrics import stage
+from app.models import StoryCluster, StoryClusterMember
+from app.services.rag import encoder, embedding_dim
+
+# Cosine similarity above which two feed entries are considered the same story
+DEDUP_SIMILARITY_THRESHOLD = float(os.environ.get("DEDUP_SIMILARITY_THRESHOLD", "0.88"))
+# Only entries published within this window of each other are grouped together
+DEDUP_WINDOW_HOURS = int(os.environ.get("DEDUP_WINDOW_HOURS", "72"))
+# Number of nearest neighbours inspected per incoming entry
+DEDUP_CANDIDATES = 10
+
+# Separate FAISS index over the *raw* feed entries (title + RSS summary).
+# The article index stores the generated Spanish text, so comparing raw
+# entries against it would miss most wire copies.
+dedup_index_file = "dedup_index.bin"
+dedup_metadata_file = "dedup_metadata.pkl"
+
+if os.path.exists(dedup_index_file):
+    dedup_index = faiss.read_index(dedup_index_file)
+    with open(dedup_metadata_file, "rb") as f:
+        dedup_metadata = pickle.load(f)
+else:
+    # Inner product over normalized vectors == cosine similarity
+    dedup_index = faiss.IndexFlatIP(embedding_dim)
+    dedup_metadata = {} # Map FAISS ID (int) -> {"article_id": int, "seen_at": datetime}
+
+# Ingestion runs on several worker threads at once (/ingest and the scheduler);
+# guards every read and write of the index, metadata and files
+dedup_lock = threading.RLock()
+
+def save_dedup_index():
+    with dedup_lock, stage("faiss.save"):
+        faiss.write_index(dedup_index, dedup_index_file)
+        with open(dedup_metadata_file, "wb") as f:
+            pickle.dump(dedup_metadata, f)
+
+def embed_entry(title: str, summary: str) -> np.ndarray:
+    """
+    Encodes a feed entry as a normalized (1, dim) float32 vector.
+    """
+    return encoder.encode([f"{title}. {summary or ''}"], normalize_embeddings=True)
+
+def find_near_duplicate(embedding: np.ndarray, published_at: Optional[datetime] = None) -> Optional[Tuple[int, float]]:
+    """
+    Returns (article_id, similarity) of the closest recent entry above the
+    similarity threshold, or None if the entry looks like a new story.
+    """
+    reference_time = published_at or datetime.utcnow()
+    window = timedelta(hours=DEDUP_WINDOW_HOURS)
+
+    with dedup_lock:
+        if dedup_index.ntotal == 0:
+            return None
+        with stage("faiss.search"):
+            D, I = dedup_index.search(embedding, k=min(DEDUP_CANDIDATES, dedup_index.ntotal))
+        for similarity, idx in zip(D[0], I[0]):
+            if idx == -1 or similarity < DEDUP_SIMILARITY_THRESHOLD:
+                # Results are sorted by similarity, nothing further can match
+                break
+            meta = dedup_metadata.get(int(idx))
+            if meta and abs(reference_time - meta["seen_at"]) <= window:
+                return meta["article_id"], float(similarity)
+
+    return None
+
+def remember_entry(embedding: np.ndarray, article_id: int, published_at: Optional[datetime] = None):
+    """
+    Adds the entry of a newly created article to the dedup index.
+    """
+    with dedup_lock:
+        dedup_index.add(embedding)
+        dedup_metadata[dedup_index.ntotal - 1] = {
+            "article_id": article_id,
+            "seen_at": published_at or datetime.utcnow(),
+        }
+
+        _prune_expired()
+        save_dedup_index()
+
+def _prune_expired():
+    """
+    Rebuilds the index without expired entries once they make up half of it,
+    so the dedup search stays proportional to the recent window only.
+    Caller holds dedup_lock.
+    """
+    global dedup_index, dedup_metadata
+
+    cutoff = datetime.utcnow() - timedelta(hours=DEDUP_WINDOW_HOURS * 2)
+    live_ids = [i for i, meta in dedup_metadata.items() if meta["seen_at"] >= cutoff]
+    if len(live_ids) * 2 > dedup_index.ntotal:
+        return
+
+    new_index = faiss.IndexFlatIP(embedding_dim)
+    new_metadata = {}
+    for old_id in sorted(live_ids):
+        new_index.add(dedup_index.reconstruct(old_id).reshape(1, -1))
+        new_metadata[new_index.ntotal - 1] = dedup_metadata[old_id]
+
+    dedup_index = new_index
+    dedup_metadata = new_metadata
+
+def add_to_story_cluster(session: Session, article_id: int, url: str, title: str, source: str, similarity: float, published_at: Optional[datetime] = None) -> StoryCluster:
+    """
+    Records a skipped duplicate entry in the cluster of its canonical article.
+    Does not commit; the caller owns the transaction.
+    """
+    cluster = session.exec(select(StoryCluster).where(StoryCluster.article_id == article_id)).first()
+    if not cluster:
+        cluster = StoryCluster(article_id=article_id)
+        session.add(cluster)
+        session.flush()
+
+    cluster.updated_at = datetime.utcnow()
+    session.add(cluster)
+    session.add(StoryClusterMember(
+        cluster_id=cluster.id,
+        url=url,
+        title=title,
+        source=source,
+        similarity=similarity,
+        published_at=published_at
+    ))
+    return cluster
@@ -0,0 +1,161 @@
+"""
+Micro-batching embedding executor.
+
+Concurrent encode calls (search queries, ingestion indexing, knowledge base
+embedding) are queued to one worker thread, which takes everything queued
+(up to EMBED_BATCH_MAX texts) and runs it as one forward pass. Under load,
+i.e. when the previous batch held more than one request, it also waits up to
+EMBED_BATCH_WAIT_MS for more requests to join; a lone request never waits. Each caller gets its own rows back
+through a future, so 64 concurrent searches cost a couple of batched passes
+instead of 64 passes of one text each.
+
+Large requests are split into chunks of EMBED_BATCH_MAX and queued apart
+from small ones (up to EMBED_PRIORITY_MAX_TEXTS texts: search queries,
+single articles), which are always taken first. A query that arrives during
+a bulk indexing job waits for at most the chunk already running, not for the
+rest of the job.
+
+    vectors = encoder.encode(texts)                # from a thread
+    vectors = await encoder.encode_async([query])  # from the event loop
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, List, Optional, Tuple
+import numpy as np
+from app.metrics import embedding_batch_size, stage, stage_latency
+
+EMBED_BATCH_MAX = int(os.environ.get("EMBED_BATCH_MAX", "64"))
+# How long the first request of a batch waits for others to join it
+EMBED_BATCH_WAIT_MS = float(os.environ.get("EMBED_BATCH_WAIT_MS", "5"))
+# Requests of at most this many texts jump ahead of queued bulk chunks
+EMBED_PRIORITY_MAX_TEXTS = int(os.environ.get("EMBED_PRIORITY_MAX_TEXTS", "8"))
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    # Same as SentenceTransformer.encode(normalize_embeddings=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class BatchingEncoder:
+    """
+    Wraps a model with the SentenceTransformer.encode interface. Thread-safe;
+    the model only ever runs on the worker thread.
+    """
+    def __init__(self, model, max_batch: int = EMBED_BATCH_MAX, max_wait_ms: float = EMBED_BATCH_WAIT_MS, priority_max_texts: int = EMBED_PRIORITY_MAX_TEXTS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.priority_max_texts = priority_max_texts
+        # (texts, future, queued_at); small requests first, bulk chunks after
+        self._urgent: Deque[Tuple[List[str], Future, float]] = deque()
+        self._bulk: Deque[Tuple[List[str], Future, float]] = deque()
+        self._ready = threading.Condition()
+        self._last_batch_requests = 0
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._start_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        """
+        Queues the texts in chunks of at most max_batch; each future resolves
+        to that chunk's (n, dim) float32 array.
+        """
+        self._ensure_worker()
+        target = self._urgent if len(texts) <= self.priority_max_texts else self._bulk
+        futures = []
+        with self._ready:
+            for start in range(0, len(texts), self.max_batch):
+                future = Future()
+                target.append((texts[start:start + self.max_batch], future, time.perf_counter()))
+                futures.append(future)
+            self._ready.notify()
+        return futures
+
+    @staticmethod
+    def _join(chunks: List[np.ndarray], normalize_embeddings: bool) -> np.ndarray:
+        vectors = np.vstack(chunks)
+        return normalize(vectors) if normalize_embeddings else vectors
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = False) -> np.ndarray:
+        """
+        Blocking encode, for executor threads and sync endpoints.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+        return self._join([f.result() for f in self.submit(texts)], normalize_embeddings)
+
+    async def encode_async(self, texts: List[str], normalize_embeddings: bool = False) -> np.ndarray:
+        """
+        Awaits the batch without holding an executor thread while waiting.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+        chunks = await asyncio.gather(*(asyncio.wrap_future(f) for f in self.submit(texts)))
+        return self._join(list(chunks), normalize_embeddings)
+
+    def _next(self, timeout: Optional[float]) -> Optional[Tuple[Deque, tuple]]:
+        """
+        Pops the next request, small ones first, waiting up to timeout
+        (None: forever). Returns (its queue, request) or None on timeout.
+        """
+        with self._ready:
+            deadline = None if timeout is None else time.perf_counter() + timeout
+            while not self._urgent and not self._bulk:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._ready.wait(remaining)
+            source = self._urgent if self._urgent else self._bulk
+            return source, source.popleft()
+
+    def _collect(self) -> list:
+        """
+        Gathers requests until the batch is full or the wait is over. A
+        request that doesn't fit goes back to the front of its queue.
+        """
+        _, first = self._next(None)
+        batch, size = [first], len(first[0])
+        wait = self.max_wait if self._last_batch_requests > 1 else 0
+        deadline = time.perf_counter() + wait
+        while size < self.max_batch:
+            popped = self._next(max(0.0, deadline - time.perf_counter()))
+            if popped is None:
+                break
+            source, request = popped
+            if size + len(request[0]) > self.max_batch:
+                with self._ready:
+                    source.appendleft(request)
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._last_batch_requests = len(batch)
+            texts = [text for request in batch for text in request[0]]
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                stage_latency.observe(("embedding.queue_wait",), started - queued_at)
+            embedding_batch_size.observe((), len(texts))
+            try:
+                with stage("embedding.encode"):
+                    vectors = np.asarray(self.model.encode(texts, batch_size=self.max_batch), dtype="float32")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for request_texts, future, _ in batch:
+                future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
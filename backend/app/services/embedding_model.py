@@ -0,0 +1,151 @@
+"""
+Loads the sentence embedding model with a selectable CPU inference backend.
+
+    EMBEDDING_BACKEND=torch       full-precision PyTorch (default)
+    EMBEDDING_BACKEND=onnx        ONNX Runtime, fp32 graph
+    EMBEDDING_BACKEND=onnx-int8   ONNX Runtime with int8 dynamic quantization
+
+The ONNX backends need `pip install "sentence-transformers[onnx]"` (Optimum
+and ONNX Runtime); without it the torch backend is used with a warning. The
+int8 model is exported once into EMBEDDING_ONNX_DIR and reused afterwards.
+
+Quantized embeddings are close to, not identical to, the PyTorch ones.
+Check before switching an existing index over:
+
+    python -m app.services.embedding_model check [backend]
+    python -m app.services.embedding_model export   # int8 export ahead of deploy
+"""
+import os
+import sys
+from typing import List, Optional
+import numpy as np
+import sentence_transformers
+
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_DIR = os.environ.get("EMBEDDING_ONNX_DIR", "embedding_models")
+# Instruction set the int8 kernels target: avx2 runs on any x86-64 server,
+# avx512_vnni is faster where available, arm64 for ARM hosts
+EMBEDDING_QUANTIZATION = os.environ.get("EMBEDDING_QUANTIZATION", "avx2")
+# Minimum cosine similarity to the PyTorch embedding accepted by `check`
+EQUIVALENCE_MIN_COSINE = float(os.environ.get("EMBEDDING_EQUIVALENCE_MIN_COSINE", "0.98"))
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def _onnx_available() -> bool:
+    try:
+        import onnxruntime # noqa: F401
+        import optimum.onnxruntime # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _quantized_dir() -> str:
+    return os.path.join(EMBEDDING_ONNX_DIR, f"{EMBEDDING_MODEL.replace('/', '__')}-int8-{EMBEDDING_QUANTIZATION}")
+
+def _quantized_file_name() -> str:
+    # export_dynamic_quantized_onnx_model writes onnx/model_<file_suffix>.onnx
+    return f"onnx/model_int8_{EMBEDDING_QUANTIZATION}.onnx"
+
+def export_quantized_model() -> str:
+    """
+    Exports EMBEDDING_MODEL to ONNX, quantizes its weights to int8 and saves
+    both under EMBEDDING_ONNX_DIR. Returns the model directory.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    path = _quantized_dir()
+    onnx_model = sentence_transformers.SentenceTransformer(EMBEDDING_MODEL, backend="onnx")
+    onnx_model.save(path)
+    export_dynamic_quantized_onnx_model(onnx_model, EMBEDDING_QUANTIZATION, path, file_suffix=f"int8_{EMBEDDING_QUANTIZATION}")
+    return path
+
+def load_model(backend: Optional[str] = None):
+    """
+    Returns the embedding model for the backend (EMBEDDING_BACKEND by default).
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}, expected one of {', '.join(BACKENDS)}")
+    if backend != "torch" and not _onnx_available():
+        print(f"WARNING: optimum/onnxruntime not installed, using the torch embedding backend instead of {backend}.")
+        backend = "torch"
+
+    if backend == "torch":
+        return sentence_transformers.SentenceTransformer(EMBEDDING_MODEL)
+    if backend == "onnx":
+        return sentence_transformers.SentenceTransformer(EMBEDDING_MODEL, backend="onnx")
+
+    path = _quantized_dir()
+    if not os.path.exists(os.path.join(path, _quantized_file_name())):
+        print(f"Exporting int8 ONNX embedding model to {path}")
+        export_quantized_model()
+    return sentence_transformers.SentenceTransformer(path, backend="onnx", model_kwargs={"file_name": _quantized_file_name()})
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """
+    Row-wise cosine similarity between two embedding matrices.
+    """
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
+
+def neighbour_overlap(reference: np.ndarray, candidate: np.ndarray, k: int = 10) -> float:
+    """
+    Mean share of each text's k nearest neighbours (within the sample) that
+    both embeddings agree on; what search and related articles actually see.
+    """
+    def top_k(vectors):
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, -np.inf)
+        return np.argsort(-similarity, axis=1)[:, :k]
+
+    k = min(k, len(reference) - 1)
+    if k < 1:
+        return 1.0
+    a, b = top_k(reference), top_k(candidate)
+    return float(np.mean([len(set(x) & set(y)) / k for x, y in zip(a, b)]))
+
+def check_equivalence(texts: List[str], backend: str) -> dict:
+    """
+    Compares a backend's embeddings of the texts against the PyTorch ones.
+    """
+    reference = np.asarray(load_model("torch").encode(texts, batch_size=64), dtype="float32")
+    candidate = np.asarray(load_model(backend).encode(texts, batch_size=64), dtype="float32")
+    cosine = cosine_agreement(reference, candidate)
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "mean_cosine": round(float(cosine.mean()), 5),
+        "min_cosine": round(float(cosine.min()), 5),
+        "top10_overlap": round(neighbour_overlap(reference, candidate), 4),
+        "ok": bool(cosine.min() >= EQUIVALENCE_MIN_COSINE),
+    }
+
+def sample_texts(limit: int = 1000) -> List[str]:
+    """
+    Embedding texts of the newest articles, as rag indexes them.
+    """
+    from sqlmodel import Session, select
+    from app.database import engine
+    from app.models import Article
+
+    with Session(engine) as session:
+        rows = session.exec(select(Article.title, Article.summary).order_by(Article.id.desc()).limit(limit)).all()
+    return [f"{title}. {summary or ''}" for title, summary in rows]
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "export":
+        print(f"Exported {export_quantized_model()}")
+    elif command == "check":
+        backend = sys.argv[2] if len(sys.argv) > 2 else "onnx-int8"
+        texts = sample_texts()
+        if not texts:
+            sys.exit("No articles to compare on")
+        result = check_equivalence(texts, backend)
+        print(result)
+        sys.exit(0 if result["ok"] else 1)
+    else:
+        print("usage: python -m app.services.embedding_model export | check [backend]")
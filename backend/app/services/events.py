@@ -0,0 +1,157 @@
+"""
+Live article change events, streamed to clients as Server-Sent Events at
+GET /events so they can patch their article lists instead of re-polling
+GET /articles.
+
+    event: created | updated | status | deleted
+    id: <process epoch>-<sequence>
+    data: {"id": 42, "status": "draft", "title": "..."}   (title may be null)
+
+Events are published from the article endpoints, bulk jobs and ingestion,
+from any thread. The last EVENTS_BUFFER_SIZE events are kept so a client
+reconnecting with Last-Event-ID (EventSource does this on its own) gets
+what it missed; when that is no longer possible it receives a `reset`
+event and should re-fetch its list once.
+
+Non-admin clients only see published articles; for other statuses they
+get the id alone, enough to drop the article from a public list.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Set
+
+EVENTS_BUFFER_SIZE = int(os.environ.get("EVENTS_BUFFER_SIZE", "1000"))
+# Events a subscriber may fall behind before it is disconnected
+EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", "500"))
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("EVENTS_KEEPALIVE_SECONDS", "15"))
+
+EVENT_TYPES = ("created", "updated", "status", "deleted")
+
+# Event ids carry the process start time so ids from before a restart are
+# recognised as unresumable, as with the cache ETags
+_epoch = int(time.time())
+_sequence = 0
+_buffer: Deque[dict] = deque(maxlen=EVENTS_BUFFER_SIZE)
+_subscribers: Set["Subscriber"] = set()
+_lock = threading.Lock()
+published_total = 0
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: "asyncio.Queue[Optional[dict]]" = asyncio.Queue()
+        self.closed = False
+
+    def deliver(self, event: Optional[dict]):
+        # Runs on the subscriber's event loop
+        if self.closed:
+            return
+        if event is None or self.queue.qsize() >= EVENTS_QUEUE_SIZE:
+            # Shutdown, or a client too slow to keep up: end the stream; it
+            # reconnects with Last-Event-ID and resumes from the buffer
+            self.closed = True
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+
+def publish_article_event(kind: str, article_id: int, status: Optional[str] = None, title: Optional[str] = None):
+    """
+    Call after the change is committed. Safe from any thread.
+    """
+    global _sequence, published_total
+    if kind not in EVENT_TYPES:
+        raise ValueError(f"Unknown article event {kind!r}")
+    with _lock:
+        _sequence += 1
+        published_total += 1
+        event = {"seq": _sequence, "type": kind, "data": {"id": article_id, "status": status, "title": title}}
+        _buffer.append(event)
+        # Queued under the lock so every subscriber sees events in sequence order
+        for subscriber in list(_subscribers):
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Event loop already closed
+                _subscribers.discard(subscriber)
+
+def _missed_events(last_event_id: Optional[str]) -> Optional[List[dict]]:
+    """
+    Buffered events after last_event_id, or None if some were already
+    dropped (or the id is from another process). Caller holds the lock.
+    """
+    if not last_event_id:
+        return []
+    epoch, _, sequence = last_event_id.partition("-")
+    if epoch != str(_epoch) or not sequence.isdigit():
+        return None
+    sequence = int(sequence)
+    if sequence < _sequence and (not _buffer or sequence + 1 < _buffer[0]["seq"]):
+        return None
+    return [event for event in _buffer if event["seq"] > sequence]
+
+def _visible(event: dict, admin: bool) -> Optional[dict]:
+    data = event["data"]
+    if admin or data["status"] == "published":
+        return data
+    if event["type"] in ("status", "deleted"):
+        return {"id": data["id"], "status": None, "title": None}
+    return None
+
+def _format(event: dict, data: dict) -> str:
+    return f"id: {_epoch}-{event['seq']}\nevent: {event['type']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_events(admin: bool, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    SSE body for one client: missed events first, then live ones, with a
+    comment line every EVENTS_KEEPALIVE_SECONDS to keep proxies from closing
+    an idle connection.
+    """
+    subscriber = Subscriber(asyncio.get_running_loop())
+    # Snapshot and subscribe atomically: nothing is missed or sent twice
+    with _lock:
+        missed = _missed_events(last_event_id)
+        current = _sequence
+        _subscribers.add(subscriber)
+    try:
+        yield "retry: 3000\n\n"
+        if missed is None:
+            yield f"id: {_epoch}-{current}\nevent: reset\ndata: {{}}\n\n"
+            missed = []
+        for event in missed:
+            data = _visible(event, admin)
+            if data is not None:
+                yield _format(event, data)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            data = _visible(event, admin)
+            if data is not None:
+                yield _format(event, data)
+    finally:
+        with _lock:
+            _subscribers.discard(subscriber)
+
+def close_subscribers():
+    """
+    Ends every open stream, so shutdown doesn't wait on idle clients.
+    """
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        try:
+            subscriber.loop.call_soon_threadsafe(subscriber.deliver, None)
+        except RuntimeError:
+            pass
+
+def stats() -> dict:
+    with _lock:
+        return {"subscribers": len(_subscribers), "published": published_total, "buffered": len(_buffer)}
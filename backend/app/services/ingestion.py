@@ -1,31 +1,83 @@
 import feedparser
 from datetime import datetime
 from sqlmodel import Session, select
-from app.models import Article
+from app.models import ArchivedArticle, Article, StoryClusterMember
 from app.database import engine
+from app.cache import invalidate_lists
+from app.services.events import publish_article_event
 from app.services.rag import index_article
+from app.services.tags import sync_article_tags
+from app.services.related import refresh_related_for
+from app.services.dedup import embed_entry, find_near_duplicate, remember_entry, add_to_story_cluster
 from app.services.llm import generate_article_content
+from app.services.executors import run_cpu, run_blocking
+from app.services.http_client import get_http_client
 from deep_translator import GoogleTranslator
 
 def parse_rss_feed(feed_url: str, source_name: str):
     feed = feedparser.parse(feed_url)
+    return ingest_entries(feed.entries, source_name)
+
+async def parse_rss_feed_async(feed_url: str, source_name: str):
+    """
+    parse_rss_feed for async handlers: the feed is fetched with the shared
+    pooled client and parsed on the CPU executor. The per-entry pipeline
+    (DB, embeddings, Gemini, translator) runs on the bounded blocking-I/O
+    executor instead of Starlette's threadpool.
+    """
+    response = await get_http_client().get(feed_url)
+    response.raise_for_status()
+    return await ingest_feed_content(response.content, source_name)
+
+async def ingest_feed_content(content: bytes, source_name: str) -> int:
+    """
+    Parses an already fetched feed on the CPU executor and ingests its entries.
+    """
+    feed = await run_cpu(feedparser.parse, content)
+    return await run_blocking(ingest_entries, feed.entries, source_name)
+
+def ingest_entries(entries, source_name: str) -> int:
     new_articles = []
     
     with Session(engine) as session:
-        for entry in feed.entries:
+        for entry in entries:
             # Check if article already exists
             existing_article = session.exec(select(Article).where(Article.url == entry.link)).first()
             if existing_article:
                 continue
+            if session.exec(select(ArchivedArticle.id).where(ArchivedArticle.url == entry.link)).first():
+                continue
+
+            # Already grouped into a story cluster as a duplicate on a previous run
+            existing_member = session.exec(select(StoryClusterMember).where(StoryClusterMember.url == entry.link)).first()
+            if existing_member:
+                continue
             
             published_at = None
             if hasattr(entry, 'published_parsed'):
                 published_at = datetime(*entry.published_parsed[:6])
             
             summary_text = entry.summary if hasattr(entry, 'summary') else ""
+
+            # Near-duplicate check: the same wire story published under another URL
+            # joins the cluster of the existing draft instead of paying for generation
+            embedding = embed_entry(entry.title, summary_text)
+            duplicate = find_near_duplicate(embedding, published_at)
+            if duplicate:
+                canonical_id, similarity = duplicate
+                # An archived canonical still owns its story (same id in the archive tier)
+                if session.get(Article, canonical_id) or session.get(ArchivedArticle, canonical_id):
+                    add_to_story_cluster(session, canonical_id, entry.link, entry.title, source_name, similarity, published_at)
+                    try:
+                        session.commit()
+                        print(f"Near-duplicate of article {canonical_id} skipped ({similarity:.2f}): {entry.link}")
+                    except Exception as e:
+                        session.rollback()
+                        print(f"Error saving story cluster member: {e}")
+                    continue
             
             # Generate content with LLM
-            # Fallback to translation if LLM fails or key is missing
+            # Fallback to translation if LLM fails, key is missing or the LLM pool is overloaded
             generated_data = generate_article_content(entry.title, summary_text)
             
              # If LLM returned original title (meaning it failed or no key), try translation
@@ -55,16 +107,25 @@ def parse_rss_feed(feed_url: str, source_name: str):
             )
             session.add(article)
             try:
+                session.flush()
+                sync_article_tags(session, article)
                 session.commit()
                 session.refresh(article)
                 
                 # Index in Vector DB
                 try:
-                    index_article(article)
+                    if index_article(article) is not None:
+                        refresh_related_for(article.id)
                 except Exception as e:
                     print(f"Error indexing article {article.id}: {e}")
 
+                try:
+                    remember_entry(embedding, article.id, published_at)
+                except Exception as e:
+                    print(f"Error adding article {article.id} to dedup index: {e}")
+
                 new_articles.append(article)
+                publish_article_event("created", article.id, article.status, article.title)
             except Exception as e:
                 session.rollback()
                 # Check if it's an integrity error (duplicate URL)
@@ -75,4 +136,7 @@ def parse_rss_feed(feed_url: str, source_name: str):
                     print(f"Error saving article: {e}")
                     continue
         
+    if new_articles:
+        invalidate_lists()
+
     return len(new_articles)
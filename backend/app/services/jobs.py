@@ -0,0 +1,199 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.cache import invalidate_article
+from app.services.events import publish_article_event
+from app.database import async_engine
+from app.models import Article
+from app.services.article_ops import apply_scraped
+from app.services.executors import run_cpu, run_blocking
+from app.services.rag import index_articles
+from app.services.related import refresh_related_for
+from app.services.revisions import set_revision_action
+from app.services.scraper import domain_of, scrape_url_async
+
+# Articles processed at once by a bulk job (each one is a Gemini call or a page fetch)
+BULK_JOB_CONCURRENCY = int(os.environ.get("BULK_JOB_CONCURRENCY", "4"))
+# Pages fetched at once by the draft scrape job; politeness is enforced per host by the scraper
+SCRAPE_JOB_CONCURRENCY = int(os.environ.get("SCRAPE_JOB_CONCURRENCY", "8"))
+# Scraped articles written per commit by the draft scrape job
+SCRAPE_COMMIT_BATCH = int(os.environ.get("SCRAPE_COMMIT_BATCH", "20"))
+# Finished jobs kept in memory for progress queries
+MAX_TRACKED_JOBS = 100
+
+jobs: "OrderedDict[str, dict]" = OrderedDict()
+# Strong references so running tasks aren't garbage collected
+_running_tasks = set()
+
+def get_job(job_id: str) -> Optional[dict]:
+    return jobs.get(job_id)
+
+def _new_job(kind: str, article_ids: List[int]) -> dict:
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "running",
+        "total": len(article_ids),
+        "succeeded": 0,
+        "failed": 0,
+        "errors": {},
+        "created_at": datetime.utcnow(),
+        "finished_at": None,
+    }
+    jobs[job["id"]] = job
+    while len(jobs) > MAX_TRACKED_JOBS:
+        jobs.popitem(last=False)
+    return job
+
+def start_article_job(kind: str, article_ids: List[int], action: Callable[[Article], Awaitable[Callable[[Article], None]]]) -> dict:
+    """
+    Runs action on each article in the background with bounded concurrency,
+    committing each article on its own, then re-indexes all updated articles
+    in one batch. Returns the job dict, which is updated in place as progress.
+
+    action gets a detached copy of the article and does the slow part (a
+    Gemini call, a page fetch) with no database session open; it returns a
+    function that applies the result to the article in a short write session.
+    """
+    job = _new_job(kind, article_ids)
+    task = asyncio.create_task(_run(job, article_ids, action))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return job
+
+async def _run(job: dict, article_ids: List[int], action: Callable[[Article], Awaitable[Callable[[Article], None]]]):
+    semaphore = asyncio.Semaphore(BULK_JOB_CONCURRENCY)
+    updated: List[Article] = []
+
+    async def process(article_id: int):
+        async with semaphore:
+            try:
+                async with AsyncSession(async_engine) as session:
+                    article = await session.get(Article, article_id)
+                if not article:
+                    raise ValueError("Article not found")
+                # No session (pooled connection, read transaction) is held
+                # across the Gemini call or its admission wait
+                apply = await action(article)
+                async with AsyncSession(async_engine) as session:
+                    set_revision_action(session, job["kind"])
+                    article = await session.get(Article, article_id)
+                    if not article:
+                        raise ValueError("Article was deleted")
+                    apply(article)
+                    session.add(article)
+                    await session.commit()
+                    await session.refresh(article)
+                invalidate_article(article_id)
+                publish_article_event("updated", article_id, article.status, article.title)
+                updated.append(article)
+                job["succeeded"] += 1
+            except Exception as e:
+                job["failed"] += 1
+                job["errors"][article_id] = str(e)
+
+    await asyncio.gather(*(process(i) for i in article_ids))
+
+    # One batched encode and one index save for the whole job
+    await _reindex(job, updated)
+
+    job["status"] = "completed"
+    job["finished_at"] = datetime.utcnow()
+
+async def _reindex(job: dict, articles: List[Article]):
+    try:
+        await run_cpu(index_articles, articles)
+        await run_blocking(lambda: [refresh_related_for(a.id) for a in articles])
+    except Exception as e:
+        print(f"Error re-indexing articles of job {job['id']}: {e}")
+
+def start_draft_scrape_job(drafts: List[Tuple[int, str]]) -> dict:
+    """
+    Scrapes the full page text of the given (article_id, url) drafts in the
+    background. Pages are fetched concurrently, results are written in
+    batches of SCRAPE_COMMIT_BATCH articles per commit, and the job reports
+    per-domain success rates and overall throughput.
+    """
+    job = _new_job("scrape-drafts", [article_id for article_id, _ in drafts])
+    job["committed"] = 0
+    job["domains"] = {}
+    job["elapsed_seconds"] = 0.0
+    job["articles_per_second"] = 0.0
+    task = asyncio.create_task(_run_draft_scrape(job, drafts))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return job
+
+async def _run_draft_scrape(job: dict, drafts: List[Tuple[int, str]]):
+    semaphore = asyncio.Semaphore(SCRAPE_JOB_CONCURRENCY)
+    commit_lock = asyncio.Lock()
+    pending: Dict[int, str] = {}
+    updated: List[Article] = []
+    started = time.perf_counter()
+
+    def domain_stats(domain: str) -> dict:
+        return job["domains"].setdefault(domain, {"succeeded": 0, "failed": 0, "success_rate": 0.0})
+
+    def record(domain: str, ok: bool):
+        stats = domain_stats(domain)
+        stats["succeeded" if ok else "failed"] += 1
+        stats["success_rate"] = round(stats["succeeded"] / (stats["succeeded"] + stats["failed"]), 3)
+        job["succeeded" if ok else "failed"] += 1
+        job["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+        job["articles_per_second"] = round(job["succeeded"] / max(job["elapsed_seconds"], 0.01), 2)
+
+    async def commit_pending():
+        async with commit_lock:
+            if not pending:
+                return
+            batch = dict(pending)
+            pending.clear()
+            async with AsyncSession(async_engine) as session:
+                set_revision_action(session, "scrape")
+                result = await session.execute(select(Article).where(Article.id.in_(list(batch))))
+                articles = list(result.scalars().all())
+                for article in articles:
+                    apply_scraped(article, batch[article.id])
+                    session.add(article)
+                await session.commit()
+                for article in articles:
+                    await session.refresh(article)
+            for article in articles:
+                invalidate_article(article.id)
+                publish_article_event("updated", article.id, article.status, article.title)
+            updated.extend(articles)
+            job["committed"] += len(articles)
+
+    async def process(article_id: int, url: str):
+        domain = domain_of(url)
+        async with semaphore:
+            try:
+                text = await scrape_url_async(url)
+                if not text:
+                    raise ValueError("No article text found on page")
+            except Exception as e:
+                job["errors"][article_id] = str(e)
+                record(domain, False)
+                return
+        pending[article_id] = text
+        record(domain, True)
+        if len(pending) >= SCRAPE_COMMIT_BATCH:
+            await commit_pending()
+
+    try:
+        await asyncio.gather(*(process(article_id, url) for article_id, url in drafts))
+        await commit_pending()
+        await _reindex(job, updated)
+        job["status"] = "completed"
+    except Exception as e:
+        print(f"Draft scrape job {job['id']} failed: {e}")
+        job["errors"]["job"] = str(e)
+        job["status"] = "failed"
+    job["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    job["finished_at"] = datetime.utcnow()
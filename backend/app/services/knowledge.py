@@ -0,0 +1,128 @@
+import re
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from app.models import KnowledgeItem, KnowledgeItemTag
+from app.services.tags import normalize_tags, get_or_create_tags
+
+# Set by setup_knowledge_search; False when SQLite was built without FTS5
+fts_available = False
+
+def setup_knowledge_search(engine: Engine):
+    """
+    Creates the FTS5 index over KnowledgeItem.content with the triggers that
+    keep it in sync, and backfills the index and tag table for existing rows.
+    """
+    global fts_available
+
+    with engine.begin() as conn:
+        try:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS knowledgeitem_fts "
+                "USING fts5(content, content='knowledgeitem', content_rowid='id')"
+            ))
+        except Exception as e:
+            print(f"WARNING: FTS5 not available, knowledge base suggestions fall back to LIKE: {e}")
+            fts_available = False
+            return
+
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS knowledgeitem_fts_ai AFTER INSERT ON knowledgeitem BEGIN "
+            "INSERT INTO knowledgeitem_fts(rowid, content) VALUES (new.id, new.content); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS knowledgeitem_fts_ad AFTER DELETE ON knowledgeitem BEGIN "
+            "INSERT INTO knowledgeitem_fts(knowledgeitem_fts, rowid, content) VALUES ('delete', old.id, old.content); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS knowledgeitem_fts_au AFTER UPDATE ON knowledgeitem BEGIN "
+            "INSERT INTO knowledgeitem_fts(knowledgeitem_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+            "INSERT INTO knowledgeitem_fts(rowid, content) VALUES (new.id, new.content); END"
+        ))
+
+        # Backfill rows created before the index existed
+        indexed = conn.execute(text("SELECT COUNT(*) FROM knowledgeitem_fts_docsize")).scalar()
+        total = conn.execute(text("SELECT COUNT(*) FROM knowledgeitem")).scalar()
+        if indexed != total:
+            conn.execute(text("INSERT INTO knowledgeitem_fts(knowledgeitem_fts) VALUES ('rebuild')"))
+
+    fts_available = True
+
+    with Session(engine) as session:
+        untagged = session.exec(
+            select(KnowledgeItem)
+            .where(KnowledgeItem.tags != None, KnowledgeItem.tags != "")
+            .where(~KnowledgeItem.id.in_(select(KnowledgeItemTag.item_id)))
+        ).all()
+        for item in untagged:
+            sync_item_tags(session, item)
+        session.commit()
+
+def sync_item_tags(session: Session, item: KnowledgeItem):
+    """
+    Mirrors the comma-separated tags of an item into the Tag/KnowledgeItemTag
+    tables. Does not commit; the caller owns the transaction.
+    """
+    existing = session.exec(select(KnowledgeItemTag).where(KnowledgeItemTag.item_id == item.id)).all()
+    for link in existing:
+        session.delete(link)
+
+    tags = get_or_create_tags(session, normalize_tags(item.tags))
+    for tag in tags.values():
+        session.add(KnowledgeItemTag(item_id=item.id, tag_id=tag.id))
+
+def _fts_query(query: str) -> str:
+    # Every word must match; the last one as a prefix since suggestions run on each keystroke
+    words = re.findall(r"\w+", query.lower())
+    terms = ['"' + w + '"' for w in words]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+def suggest_knowledge_items(session: Session, tags: str = "", query: str = "", limit: int = 20) -> List[KnowledgeItem]:
+    """
+    Items sharing at least one tag or whose content matches the query, in one
+    ranked query: most shared tags first, then by FTS5 bm25 rank.
+    """
+    tag_names = normalize_tags(tags)
+    match = _fts_query(query) if query else ""
+    if not tag_names and not match:
+        return []
+
+    params = {"limit": limit}
+    hits = []
+    if tag_names:
+        placeholders = ", ".join(f":tag{i}" for i in range(len(tag_names)))
+        params.update({f"tag{i}": name for i, name in enumerate(tag_names)})
+        hits.append(
+            "SELECT kit.item_id AS id, COUNT(*) AS tag_score, NULL AS text_rank "
+            "FROM knowledgeitemtag kit JOIN tag t ON t.id = kit.tag_id "
+            f"WHERE t.name IN ({placeholders}) GROUP BY kit.item_id"
+        )
+    if match and fts_available:
+        params["match"] = match
+        # Only the best text matches are candidates; the LIMIT also keeps SQLite
+        # from flattening the subquery, which bm25() does not allow
+        params["text_limit"] = max(limit * 10, 200)
+        hits.append(
+            "SELECT * FROM (SELECT rowid AS id, 0 AS tag_score, bm25(knowledgeitem_fts) AS text_rank "
+            "FROM knowledgeitem_fts WHERE knowledgeitem_fts MATCH :match "
+            "ORDER BY text_rank LIMIT :text_limit)"
+        )
+    elif query:
+        params["like"] = f"%{query.lower()}%"
+        hits.append(
+            "SELECT id, 0 AS tag_score, 0 AS text_rank FROM knowledgeitem WHERE lower(content) LIKE :like"
+        )
+
+    statement = text(
+        "SELECT k.* FROM knowledgeitem k JOIN ("
+        "SELECT id, SUM(tag_score) AS tag_score, MIN(text_rank) AS text_rank "
+        f"FROM ({' UNION ALL '.join(hits)}) GROUP BY id"
+        ") h ON h.id = k.id "
+        "ORDER BY h.tag_score DESC, h.text_rank IS NULL, h.text_rank, k.id DESC "
+        "LIMIT :limit"
+    ).bindparams(**params)
+
+    return list(session.scalars(select(KnowledgeItem).from_statement(statement)).all())
@@ -0,0 +1,87 @@
+import faiss
+import numpy as np
+import os
+import threading
+from typing import List, Tuple
+from sqlmodel import Session, select
+from app.metrics import stage
+from app.models import KnowledgeItem
+from app.services.rag import encoder, embedding_dim
+
+# Items encoded per forward pass when indexing or backfilling
+ENCODE_BATCH_SIZE = 64
+
+# FAISS index over KnowledgeItem content, keyed directly by KnowledgeItem.id
+knowledge_index_file = "faiss_knowledge_index.bin"
+
+if os.path.exists(knowledge_index_file):
+    knowledge_index = faiss.read_index(knowledge_index_file)
+else:
+    # Inner product over normalized vectors == cosine similarity
+    knowledge_index = faiss.IndexIDMap(faiss.IndexFlatIP(embedding_dim))
+
+# The knowledge-base endpoints run concurrently on the threadpool; guards
+# every add, removal, search and save of the index
+knowledge_index_lock = threading.RLock()
+
+def save_knowledge_index():
+    with knowledge_index_lock, stage("faiss.save"):
+        faiss.write_index(knowledge_index, knowledge_index_file)
+
+def _encode(texts: List[str]) -> np.ndarray:
+    return encoder.encode(texts, normalize_embeddings=True)
+
+def indexed_item_ids() -> set:
+    with knowledge_index_lock:
+        return set(faiss.vector_to_array(knowledge_index.id_map).tolist())
+
+def index_knowledge_items(items: List[KnowledgeItem]):
+    """
+    Encodes the items in batches, adds them to the index and persists it.
+    """
+    items = [item for item in items if item.id is not None]
+    if not items:
+        return
+
+    for start in range(0, len(items), ENCODE_BATCH_SIZE):
+        batch = items[start:start + ENCODE_BATCH_SIZE]
+        embeddings = _encode([item.content for item in batch])
+        ids = np.array([item.id for item in batch], dtype='int64')
+        with knowledge_index_lock, stage("faiss.add"):
+            knowledge_index.add_with_ids(embeddings, ids)
+
+    save_knowledge_index()
+
+def remove_knowledge_item(item_id: int):
+    with knowledge_index_lock:
+        knowledge_index.remove_ids(np.array([item_id], dtype='int64'))
+        save_knowledge_index()
+
+def backfill_knowledge_index(session: Session) -> int:
+    """
+    Indexes the KnowledgeItem rows missing from the index (e.g. created before
+    semantic suggestions existed). Returns the number of items added.
+    """
+    known = indexed_item_ids()
+    missing = [item for item in session.exec(select(KnowledgeItem)).all() if item.id not in known]
+    index_knowledge_items(missing)
+    return len(missing)
+
+def search_knowledge(text: str, k: int = 5) -> List[Tuple[int, float]]:
+    """
+    Returns [(knowledge_item_id, cosine_similarity), ...] closest to the text.
+    """
+    if knowledge_index.ntotal == 0 or not text:
+        return []
+
+    query = _encode([text])
+    with knowledge_index_lock, stage("faiss.search"):
+        if knowledge_index.ntotal == 0:
+            return []
+        D, I = knowledge_index.search(query, k=min(k, knowledge_index.ntotal))
+    return [(int(idx), float(score)) for score, idx in zip(D[0], I[0]) if idx != -1]
+
+if __name__ == "__main__":
+    from app.database import engine
+    with Session(engine) as session:
+        print(f"Indexed {backfill_knowledge_index(session)} knowledge items")
@@ -1,6 +1,8 @@
 import os
 import google.generativeai as genai
 from typing import Optional
+from app.metrics import stage
+from app.services.admission import admit, admit_sync
 
 # Configure API Key
 # Ideally this should be in an environment variable
@@ -18,22 +20,12 @@ print(f"DEBUG: GEMINI_API_KEY found: {bool(API_KEY)}")
 if API_KEY:
     genai.configure(api_key=API_KEY)
 
-def generate_article_content(title: str, summary: str, source_text: str = "") -> dict:
-    """
-    Generates a synthetic article using Gemini.
-    Returns a dictionary with 'title' and 'content'.
-    """
-    if not API_KEY:
-        print("WARNING: GEMINI_API_KEY not found. Returning original content.")
-        return {"title": title, "content": summary}
+GEMINI_MODEL = 'gemini-flash-latest'
 
-    try:
-        print("DEBUG: Starting Gemini generation...")
-        model = genai.GenerativeModel('gemini-flash-latest')
-        
-        # 🤖 PROMPT MULTI-AGENTE / AGENTE AUTÓNOMO DE VARIOS PASOS PARA REESCRITURA DE NOTICIAS (GEMINI 2.5)
+def _generation_prompt(title: str, summary: str, source_text: str = "") -> str:
+    # 🤖 PROMPT MULTI-AGENTE / AGENTE AUTÓNOMO DE VARIOS PASOS PARA REESCRITURA DE NOTICIAS (GEMINI 2.5)
 
-        prompt = f"""
+    prompt = f"""
         Eres un **agente autónomo de periodismo asistido por IA**.  
         Tu misión es **buscar noticias, analizarlas, extraer hechos y reescribirlas** con calidad profesional, neutralidad editorial y originalidad total.
 
@@ -125,44 +117,69 @@ def generate_article_content(title: str, summary: str, source_text: str = "") ->
         Resumen/Contexto: {summary}
         {f'Texto Fuente: {source_text}' if source_text else ''}
         """
+    return prompt
 
-        response = model.generate_content(prompt)
-        
-        # Simple parsing (Gemini usually returns markdown json or plain text)
-        # We will try to extract JSON if possible, or just use the text
-        text = response.text
-        
-        # Clean up markdown code blocks if present
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-            
-        import json
-        data = json.loads(text)
+def _parse_generation_response(text: str, title: str, summary: str) -> dict:
+    # Simple parsing (Gemini usually returns markdown json or plain text)
+    # We will try to extract JSON if possible, or just use the text
+
+    # Clean up markdown code blocks if present
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
         
-        return {
-            "title": data.get("title", title),
-            "content": data.get("content", summary),
-            "tags": data.get("tags", [])
-        }
+    import json
+    data = json.loads(text)
+    
+    return {
+        "title": data.get("title", title),
+        "content": data.get("content", summary),
+        "tags": data.get("tags", [])
+    }
+
+def generate_article_content(title: str, summary: str, source_text: str = "", llm_class: str = "ingestion") -> dict:
+    """
+    Generates a synthetic article using Gemini.
+    Returns a dictionary with 'title' and 'content'.
+    """
+    if not API_KEY:
+        print("WARNING: GEMINI_API_KEY not found. Returning original content.")
+        return {"title": title, "content": summary}
+
+    try:
+        print("DEBUG: Starting Gemini generation...")
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        with admit_sync(llm_class), stage("llm.generate"):
+            response = model.generate_content(_generation_prompt(title, summary, source_text))
+        return _parse_generation_response(response.text, title, summary)
 
     except Exception as e:
         print(f"Error generating content with Gemini: {e}")
         return {"title": title, "content": summary}
 
-def refine_article_content(content: str, instruction: str) -> str:
+async def generate_article_content_async(title: str, summary: str, source_text: str = "", llm_class: str = "interactive") -> dict:
     """
-    Refines existing article content based on a specific instruction using Gemini.
+    generate_article_content without blocking the event loop.
     """
     if not API_KEY:
         print("WARNING: GEMINI_API_KEY not found. Returning original content.")
-        return content
+        return {"title": title, "content": summary}
 
-    try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        
-        prompt = f"""
+    # Outside the try: an overloaded pool surfaces as 429/503, not as fallback content
+    async with admit(llm_class):
+        try:
+            model = genai.GenerativeModel(GEMINI_MODEL)
+            with stage("llm.generate"):
+                response = await model.generate_content_async(_generation_prompt(title, summary, source_text))
+            return _parse_generation_response(response.text, title, summary)
+
+        except Exception as e:
+            print(f"Error generating content with Gemini: {e}")
+            return {"title": title, "content": summary}
+
+def _refine_prompt(content: str, instruction: str) -> str:
+    prompt = f"""
         Actúa como un editor experto. Tu tarea es modificar el siguiente texto periodístico siguiendo estrictamente esta instrucción:
         
         INSTRUCCIÓN: {instruction}
@@ -172,25 +189,47 @@ def refine_article_content(content: str, instruction: str) -> str:
         
         IMPORTANTE: Devuelve ÚNICAMENTE el texto modificado. No añadas introducciones, explicaciones ni comillas adicionales. Mantén el formato original (párrafos, etc.) a menos que la instrucción diga lo contrario.
         """
+    return prompt
 
-        response = model.generate_content(prompt)
+def refine_article_content(content: str, instruction: str, llm_class: str = "interactive") -> str:
+    """
+    Refines existing article content based on a specific instruction using Gemini.
+    """
+    if not API_KEY:
+        print("WARNING: GEMINI_API_KEY not found. Returning original content.")
+        return content
+
+    try:
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        with admit_sync(llm_class), stage("llm.refine"):
+            response = model.generate_content(_refine_prompt(content, instruction))
         return response.text.strip()
 
     except Exception as e:
         print(f"Error refining content with Gemini: {e}")
         return content
 
-def audit_article_content(content: str, original_content: str = "") -> str:
+async def refine_article_content_async(content: str, instruction: str, llm_class: str = "interactive") -> str:
     """
-    Audits the article content for errors using Gemini.
+    refine_article_content without blocking the event loop.
     """
     if not API_KEY:
-        return "Error: API Key not found."
+        print("WARNING: GEMINI_API_KEY not found. Returning original content.")
+        return content
 
-    try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        
-        prompt = f"""
+    async with admit(llm_class):
+        try:
+            model = genai.GenerativeModel(GEMINI_MODEL)
+            with stage("llm.refine"):
+                response = await model.generate_content_async(_refine_prompt(content, instruction))
+            return response.text.strip()
+
+        except Exception as e:
+            print(f"Error refining content with Gemini: {e}")
+            return content
+
+def _audit_prompt(content: str, original_content: str = "") -> str:
+    prompt = f"""
         Eres un agente auditor especializado en revisar artículos reescritos por otra IA. 
         No debes corregir ni reescribir: SOLO DETECTAR ERRORES.
 
@@ -278,10 +317,39 @@ def audit_article_content(content: str, original_content: str = "") -> str:
         - Nunca inventar hechos nuevos.
         - Nunca corregir el artículo. Solo DETECTAR.
         """
+    return prompt
+
+def audit_article_content(content: str, original_content: str = "", llm_class: str = "interactive") -> str:
+    """
+    Audits the article content for errors using Gemini.
+    """
+    if not API_KEY:
+        return "Error: API Key not found."
 
-        response = model.generate_content(prompt)
+    try:
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        with admit_sync(llm_class), stage("llm.audit"):
+            response = model.generate_content(_audit_prompt(content, original_content))
         return response.text.strip()
 
     except Exception as e:
         print(f"Error auditing content with Gemini: {e}")
         return f"Error auditing content: {str(e)}"
+
+async def audit_article_content_async(content: str, original_content: str = "", llm_class: str = "interactive") -> str:
+    """
+    audit_article_content without blocking the event loop.
+    """
+    if not API_KEY:
+        return "Error: API Key not found."
+
+    async with admit(llm_class):
+        try:
+            model = genai.GenerativeModel(GEMINI_MODEL)
+            with stage("llm.audit"):
+                response = await model.generate_content_async(_audit_prompt(content, original_content))
+            return response.text.strip()
+
+        except Exception as e:
+            print(f"Error auditing content with Gemini: {e}")
+            return f"Error auditing content: {str(e)}"
@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from typing import Iterator, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Directory holding fetched pages: <key>.html.gz plus a <key>.json sidecar
+PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR", "page_cache")
+# Pages fetched this recently are served without revalidating with the origin
+PAGE_CACHE_FRESH_SECONDS = int(os.environ.get("PAGE_CACHE_FRESH_SECONDS", "300"))
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid", "ocid"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizes a URL so the same page shared with different tracking
+    parameters, fragments or host casing maps to one cache entry.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+def content_hash(html: bytes) -> str:
+    return hashlib.sha256(html).hexdigest()
+
+def _key(url: str) -> str:
+    return hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+
+def _paths(url: str) -> Tuple[str, str]:
+    key = _key(url)
+    return os.path.join(PAGE_CACHE_DIR, f"{key}.json"), os.path.join(PAGE_CACHE_DIR, f"{key}.html.gz")
+
+def _replace(path: str, write):
+    # Write then rename so readers never see a half-written file. Each write
+    # gets its own temp file, so concurrent scrapes of one page don't mix.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def _write_json(path: str, data: dict):
+    _replace(path, lambda f: f.write(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+
+def _write_gzip(f, html: bytes):
+    with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as gz:
+        gz.write(html)
+
+def get_entry(url: str) -> Optional[dict]:
+    """
+    Metadata of the cached page: url, etag, last_modified, content_hash,
+    size, fetched_at, checked_at and the cached extraction, if any.
+    """
+    meta_path, _ = _paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def load_html(url: str) -> Optional[bytes]:
+    _, html_path = _paths(url)
+    try:
+        with gzip.open(html_path, "rb") as f:
+            return f.read()
+    except (OSError, EOFError, zlib.error):
+        # Missing or truncated/corrupt body
+        return None
+
+def discard(url: str):
+    """
+    Forgets the cached page, e.g. when its body can no longer be read.
+    """
+    for path in _paths(url):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def is_fresh(entry: dict) -> bool:
+    return time.time() - entry.get("checked_at", 0) < PAGE_CACHE_FRESH_SECONDS
+
+def conditional_headers(entry: Optional[dict]) -> dict:
+    """
+    If-None-Match / If-Modified-Since headers to revalidate a cached page.
+    """
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def store(url: str, html: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None) -> dict:
+    """
+    Saves a freshly fetched page. The compressed body is only rewritten
+    when its content hash changed; a cached extraction is kept in that case.
+    """
+    os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+    meta_path, html_path = _paths(url)
+    previous = get_entry(url)
+    digest = content_hash(html)
+    now = time.time()
+
+    unchanged = previous is not None and previous.get("content_hash") == digest and os.path.exists(html_path)
+    if not unchanged:
+        _replace(html_path, lambda f: _write_gzip(f, html))
+
+    entry = {
+        "url": canonical_url(url),
+        "etag": etag,
+        "last_modified": last_modified,
+        "content_hash": digest,
+        "size": len(html),
+        "fetched_at": previous["fetched_at"] if unchanged else now,
+        "checked_at": now,
+        "extracted": previous.get("extracted") if unchanged else None,
+    }
+    _write_json(meta_path, entry)
+    return entry
+
+def mark_revalidated(url: str, entry: dict) -> dict:
+    """
+    Records a 304 from the origin: the cached body is still current.
+    """
+    entry["checked_at"] = time.time()
+    meta_path, _ = _paths(url)
+    _write_json(meta_path, entry)
+    return entry
+
+def cached_extraction(entry: Optional[dict], version: int) -> Optional[str]:
+    """
+    Text previously extracted from this exact body by the given extractor version.
+    """
+    extracted = (entry or {}).get("extracted")
+    if extracted and extracted.get("version") == version and extracted.get("content_hash") == entry.get("content_hash"):
+        return extracted["text"]
+    return None
+
+def save_extraction(url: str, entry: dict, version: int, text: str):
+    entry["extracted"] = {"version": version, "content_hash": entry["content_hash"], "text": text}
+    meta_path, _ = _paths(url)
+    _write_json(meta_path, entry)
+
+def iter_cached_pages() -> Iterator[Tuple[dict, bytes]]:
+    """
+    Yields (metadata, html) for every cached page, for offline extraction runs.
+    """
+    if not os.path.isdir(PAGE_CACHE_DIR):
+        return
+    for name in sorted(os.listdir(PAGE_CACHE_DIR)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(PAGE_CACHE_DIR, name), encoding="utf-8") as f:
+            entry = json.load(f)
+        html = load_html(entry["url"])
+        if html is not None:
+            yield entry, html
+
+if __name__ == "__main__":
+    # python -m app.services.page_cache [stats | export <dir>]
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "export":
+        target = sys.argv[2]
+        os.makedirs(target, exist_ok=True)
+        count = 0
+        for entry, html in iter_cached_pages():
+            with open(os.path.join(target, f"{entry['content_hash'][:16]}.html"), "wb") as f:
+                f.write(html)
+            count += 1
+        print(f"Exported {count} pages to {target}")
+    else:
+        pages = raw = compressed = 0
+        for name in os.listdir(PAGE_CACHE_DIR) if os.path.isdir(PAGE_CACHE_DIR) else []:
+            path = os.path.join(PAGE_CACHE_DIR, name)
+            if name.endswith(".html.gz"):
+                compressed += os.path.getsize(path)
+            elif name.endswith(".json"):
+                with open(path, encoding="utf-8") as f:
+                    raw += json.load(f).get("size", 0)
+                pages += 1
+        print(f"{pages} pages, {raw / 1024:.0f}KB of HTML stored in {compressed / 1024:.0f}KB")
@@ -0,0 +1,253 @@
+"""
+Static snapshot of the public site: pre-rendered JSON for the published
+article list pages and each published article, plus RSS 2.0, Atom and
+JSON Feed documents, written to STATIC_PUBLISH_DIR for the frontend or a
+CDN to serve without going through the API.
+
+    articles/page-1.json ... page-N.json   list projection, newest first
+    articles/<id>.json                     same body as GET /articles/<id>
+    feed.xml, atom.xml, feed.json          latest FEED_SIZE articles
+
+Publishing is incremental: changed article ids are queued by
+invalidate_article and a single worker re-renders only those articles plus
+the list pages and feeds, and only files whose bytes changed are rewritten.
+
+    python -m app.services.publisher       # full rebuild
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Iterable, List, Optional
+from xml.sax.saxutils import escape
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session, select
+from app.database import engine
+from app.models import Article
+from app.pagination import ARTICLE_LIST_FIELDS, query_article_page
+
+STATIC_PUBLISH_ENABLED = os.environ.get("STATIC_PUBLISH_ENABLED", "0") == "1"
+STATIC_PUBLISH_DIR = os.environ.get("STATIC_PUBLISH_DIR", "static_site")
+# Public frontend, used for the links inside the feeds
+SITE_URL = os.environ.get("SITE_URL", "http://localhost:3000").rstrip("/")
+SITE_TITLE = os.environ.get("SITE_TITLE", "Raíz")
+PUBLISH_PAGE_SIZE = int(os.environ.get("PUBLISH_PAGE_SIZE", "50"))
+FEED_SIZE = int(os.environ.get("FEED_SIZE", "50"))
+
+_pending: set = set()
+_full_rebuild = False
+_wake = threading.Event()
+_worker: Optional[threading.Thread] = None
+_pending_lock = threading.Lock()
+# Serializes renders so two publishes never interleave writes
+_publish_lock = threading.Lock()
+# Hash of every file written, so unchanged files are not rewritten
+_written: dict = {}
+
+def _article_url(article_id: int) -> str:
+    return f"{SITE_URL}/article/{article_id}"
+
+def _write(relative_path: str, body: bytes) -> bool:
+    """
+    Atomically writes the file if its content changed. Returns True if written.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    path = os.path.join(STATIC_PUBLISH_DIR, relative_path)
+    if relative_path not in _written and os.path.exists(path):
+        # First write since startup: compare against what is on disk
+        with open(path, "rb") as f:
+            _written[relative_path] = hashlib.sha256(f.read()).hexdigest()
+    if _written.get(relative_path) == digest and os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+    _written[relative_path] = digest
+    return True
+
+def _remove(relative_path: str) -> bool:
+    _written.pop(relative_path, None)
+    try:
+        os.remove(os.path.join(STATIC_PUBLISH_DIR, relative_path))
+        return True
+    except FileNotFoundError:
+        return False
+
+def _json(data) -> bytes:
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _rfc822(value: Optional[datetime]) -> str:
+    # Stored datetimes are naive UTC
+    return format_datetime((value or datetime.utcnow()).replace(tzinfo=timezone.utc), usegmt=True)
+
+def _iso(value: Optional[datetime]) -> str:
+    return (value or datetime.utcnow()).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def render_rss(articles: List[Article]) -> bytes:
+    items = []
+    for a in articles:
+        categories = "".join(f"<category>{escape(t.strip())}</category>" for t in (a.tags or "").split(",") if t.strip())
+        items.append(
+            f"<item><title>{escape(a.title)}</title><link>{escape(_article_url(a.id))}</link>"
+            f'<guid isPermaLink="true">{escape(_article_url(a.id))}</guid>'
+            f"<pubDate>{_rfc822(a.published_at or a.created_at)}</pubDate>"
+            f"<description>{escape(a.summary or '')}</description>{categories}</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+        f"<title>{escape(SITE_TITLE)}</title><link>{escape(SITE_URL)}</link>"
+        f"<description>{escape(SITE_TITLE)}</description><language>es</language>"
+        f"<lastBuildDate>{_rfc822(articles[0].published_at if articles else None)}</lastBuildDate>"
+        f"{''.join(items)}</channel></rss>\n"
+    ).encode("utf-8")
+
+def render_atom(articles: List[Article]) -> bytes:
+    entries = []
+    for a in articles:
+        entries.append(
+            f"<entry><title>{escape(a.title)}</title>"
+            f'<link href="{escape(_article_url(a.id))}"/><id>{escape(_article_url(a.id))}</id>'
+            f"<updated>{_iso(a.published_at or a.created_at)}</updated>"
+            f"<summary>{escape(a.summary or '')}</summary>"
+            f'<content type="text">{escape(a.content or "")}</content></entry>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>{escape(SITE_TITLE)}</title><id>{escape(SITE_URL)}/</id>"
+        f'<link href="{escape(SITE_URL)}/"/><link rel="self" href="{escape(SITE_URL)}/atom.xml"/>'
+        f"<updated>{_iso(articles[0].published_at if articles else None)}</updated>"
+        f"{''.join(entries)}</feed>\n"
+    ).encode("utf-8")
+
+def render_json_feed(articles: List[Article]) -> bytes:
+    return _json({
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": SITE_TITLE,
+        "home_page_url": SITE_URL,
+        "feed_url": f"{SITE_URL}/feed.json",
+        "language": "es",
+        "items": [
+            {
+                "id": str(a.id),
+                "url": _article_url(a.id),
+                "title": a.title,
+                "content_text": a.content,
+                "summary": a.summary,
+                "date_published": _iso(a.published_at or a.created_at),
+                "tags": [t.strip() for t in (a.tags or "").split(",") if t.strip()],
+                "external_url": a.url,
+            }
+            for a in articles
+        ],
+    })
+
+def _publish_lists(session: Session) -> List[str]:
+    written = []
+    rows, _ = query_article_page(session, "published", None, None, ARTICLE_LIST_FIELDS)
+    total_pages = max(1, -(-len(rows) // PUBLISH_PAGE_SIZE))
+    for page in range(1, total_pages + 1):
+        items = rows[(page - 1) * PUBLISH_PAGE_SIZE:page * PUBLISH_PAGE_SIZE]
+        body = _json({
+            "page": page,
+            "total_pages": total_pages,
+            "total": len(rows),
+            "next": f"page-{page + 1}.json" if page < total_pages else None,
+            "items": items,
+        })
+        if _write(f"articles/page-{page}.json", body):
+            written.append(f"articles/page-{page}.json")
+
+    # Drop pages left over from when there were more published articles
+    page = total_pages + 1
+    while _remove(f"articles/page-{page}.json"):
+        written.append(f"articles/page-{page}.json")
+        page += 1
+
+    latest = session.exec(
+        select(Article).where(Article.status == "published")
+        .order_by(Article.published_at.desc(), Article.id.desc()).limit(FEED_SIZE)
+    ).all()
+    for path, body in (("feed.xml", render_rss(latest)), ("atom.xml", render_atom(latest)), ("feed.json", render_json_feed(latest))):
+        if _write(path, body):
+            written.append(path)
+    return written
+
+def publish_articles(article_ids: Iterable[int]) -> List[str]:
+    """
+    Re-renders the given articles (removing the ones no longer published),
+    the list pages and the feeds. Returns the paths that were rewritten.
+    """
+    with _publish_lock, Session(engine) as session:
+        written = []
+        for article_id in set(article_ids):
+            article = session.get(Article, article_id)
+            path = f"articles/{article_id}.json"
+            if article is None or article.status != "published":
+                if _remove(path):
+                    written.append(path)
+            elif _write(path, _json(article)):
+                written.append(path)
+        return written + _publish_lists(session)
+
+def publish_all() -> List[str]:
+    """
+    Full rebuild: every published article, list page and feed, and removes
+    article files that are no longer published.
+    """
+    with Session(engine) as session:
+        published = set(session.exec(select(Article.id).where(Article.status == "published")).all())
+    stale = set()
+    articles_dir = os.path.join(STATIC_PUBLISH_DIR, "articles")
+    if os.path.isdir(articles_dir):
+        for name in os.listdir(articles_dir):
+            stem = name[:-len(".json")]
+            if name.endswith(".json") and stem.isdigit() and int(stem) not in published:
+                stale.add(int(stem))
+    return publish_articles(published | stale)
+
+def schedule_publish(article_id: Optional[int] = None):
+    """
+    Queues an article for re-rendering (None queues a full rebuild). Bursts,
+    like bulk status changes, are coalesced into one publish by the worker.
+    """
+    global _full_rebuild
+    with _pending_lock:
+        if article_id is None:
+            _full_rebuild = True
+        else:
+            _pending.add(article_id)
+    _wake.set()
+
+def _run_worker():
+    global _full_rebuild
+    while True:
+        _wake.wait()
+        _wake.clear()
+        with _pending_lock:
+            ids, full = set(_pending), _full_rebuild
+            _pending.clear()
+            _full_rebuild = False
+        try:
+            written = publish_all() if full else publish_articles(ids)
+            if written:
+                print(f"Static publish: {len(written)} file(s) updated")
+        except Exception as e:
+            print(f"Error publishing static snapshot: {e}")
+
+def start_publisher():
+    """
+    Starts the background worker and queues an initial full rebuild.
+    """
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run_worker, name="static-publisher", daemon=True)
+        _worker.start()
+    schedule_publish()
+
+if __name__ == "__main__":
+    files = publish_all()
+    print(f"Published {len(files)} file(s) to {STATIC_PUBLISH_DIR}")
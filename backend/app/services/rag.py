@@ -2,13 +2,19 @@ import faiss
 import numpy as np
 import pickle
 import os
-from sentence_transformers import SentenceTransformer
+import threading
+from app.metrics import stage
+from app.services.embedder import BatchingEncoder
+from app.services.embedding_model import load_model
+from app.services.executors import run_cpu
 from app.models import Article
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-# Initialize Sentence Transformer model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# Initialize Sentence Transformer model (EMBEDDING_BACKEND selects torch or ONNX Runtime)
+model = load_model()
 embedding_dim = 384
+# Every encode goes through the shared micro-batching executor
+encoder = BatchingEncoder(model)
 
 # Initialize FAISS index
 index_file = "faiss_index.bin"
@@ -22,31 +28,39 @@ else:
     index = faiss.IndexFlatL2(embedding_dim)
     metadata_store = {} # Map ID (int) -> Metadata (dict)
 
+# Vectors of archived articles live in their own index (see app.services.archive)
+archive_index_file = "faiss_index_archive.bin"
+archive_metadata_file = "faiss_metadata_archive.pkl"
+
+if os.path.exists(archive_index_file):
+    archive_index = faiss.read_index(archive_index_file)
+    with open(archive_metadata_file, "rb") as f:
+        archive_metadata_store = pickle.load(f)
+else:
+    archive_index = faiss.IndexFlatL2(embedding_dim)
+    archive_metadata_store = {}
+
+# Serializes changes to the indexes; moving vectors between tiers replaces them
+index_lock = threading.RLock()
+
 def save_index():
-    faiss.write_index(index, index_file)
-    with open(metadata_file, "wb") as f:
-        pickle.dump(metadata_store, f)
+    with stage("faiss.save"):
+        faiss.write_index(index, index_file)
+        with open(metadata_file, "wb") as f:
+            pickle.dump(metadata_store, f)
 
-def index_article(article: Article):
-    """
-    Adds an article to the FAISS index.
-    """
-    if article.id is None:
-        return
+def save_archive_index():
+    with stage("faiss.save"):
+        faiss.write_index(archive_index, archive_index_file)
+        with open(archive_metadata_file, "wb") as f:
+            pickle.dump(archive_metadata_store, f)
 
+def _embedding_text(article: Article) -> str:
     # Combine title and summary/content for embedding
-    text_to_embed = f"{article.title}. {article.summary or ''}"
-    embedding = model.encode([text_to_embed])
-    
-    # Add to FAISS
-    index.add(np.array(embedding).astype('float32'))
-    
-    # Store metadata (using FAISS internal ID which is sequential 0..N-1)
-    # Note: In a real app with updates/deletes, we'd need ID mapping. 
-    # Here we assume append-only and sync with DB ID if possible, 
-    # but FAISS IDs are just indices. Let's map FAISS ID -> Article Data
-    faiss_id = index.ntotal - 1
-    metadata_store[faiss_id] = {
+    return f"{article.title}. {article.summary or ''}"
+
+def _metadata(article: Article, text_to_embed: str) -> dict:
+    return {
         "id": article.id,
         "title": article.title,
         "url": article.url,
@@ -54,24 +68,166 @@ def index_article(article: Article):
         "published_at": str(article.published_at) if article.published_at else "",
         "content_snippet": text_to_embed[:200]
     }
+
+def index_article(article: Article) -> Optional[int]:
+    """
+    Adds an article to the FAISS index and returns its FAISS ID.
+    """
+    if article.id is None:
+        return None
+
+    text_to_embed = _embedding_text(article)
+    embedding = encoder.encode([text_to_embed])
     
-    save_index()
+    with index_lock:
+        # Add to FAISS
+        with stage("faiss.add"):
+            index.add(np.array(embedding).astype('float32'))
+
+        # Store metadata (using FAISS internal ID which is sequential 0..N-1)
+        # Note: In a real app with updates/deletes, we'd need ID mapping.
+        # Here we assume append-only and sync with DB ID if possible,
+        # but FAISS IDs are just indices. Let's map FAISS ID -> Article Data
+        faiss_id = index.ntotal - 1
+        metadata_store[faiss_id] = _metadata(article, text_to_embed)
+
+        save_index()
+    return faiss_id
+
+def live_faiss_id(article_id: int) -> Optional[int]:
+    """
+    Current FAISS ID of the article's vector in the live index (the newest
+    one if it was indexed twice), or None. Call with index_lock held.
+    """
+    faiss_ids = [k for k, meta in metadata_store.items() if meta["id"] == article_id]
+    return max(faiss_ids) if faiss_ids else None
+
+def _forget_articles(article_ids: set):
+    # The flat index is append-only; dropping the metadata hides stale vectors
+    # from search_similar and the related-articles join
+    for faiss_id in [k for k, meta in metadata_store.items() if meta["id"] in article_ids]:
+        del metadata_store[faiss_id]
 
-def search_similar(query: str, n_results: int = 5) -> List[dict]:
+def index_articles(articles: List[Article]) -> List[int]:
     """
-    Searches for similar articles in the FAISS index.
+    Batch (re-)indexing: one batched encode, one add and one save for the
+    whole list. Earlier vectors of the same articles are replaced.
+    Returns the new FAISS IDs in input order.
     """
-    if index.ntotal == 0:
+    articles = [a for a in articles if a.id is not None]
+    if not articles:
         return []
 
-    embedding = model.encode([query])
-    D, I = index.search(np.array(embedding).astype('float32'), k=n_results)
+    texts = [_embedding_text(a) for a in articles]
+    embeddings = encoder.encode(texts)
+
+    with index_lock:
+        _forget_articles({a.id for a in articles})
+        start = index.ntotal
+        with stage("faiss.add"):
+            index.add(np.array(embeddings).astype('float32'))
+        for offset, (article, text_to_embed) in enumerate(zip(articles, texts)):
+            metadata_store[start + offset] = _metadata(article, text_to_embed)
+
+        save_index()
+    return list(range(start, start + len(articles)))
+
+def remove_articles(article_ids: List[int]):
+    """
+    Removes deleted articles from search results, saving the index once.
+    """
+    if not article_ids:
+        return
+    ids = set(article_ids)
+    with index_lock:
+        _forget_articles(ids)
+        save_index()
+        archived = [k for k, meta in archive_metadata_store.items() if meta["id"] in ids]
+        if archived:
+            for faiss_id in archived:
+                del archive_metadata_store[faiss_id]
+            save_archive_index()
+
+def _split(src_index, src_metadata: Dict[int, dict], article_ids: set):
+    """
+    Splits an index into the vectors (and metadata) of the given articles and
+    a compacted index holding the rest. Vectors without metadata (replaced or
+    removed articles) are dropped.
+    """
+    moving = [k for k, meta in src_metadata.items() if meta["id"] in article_ids]
+    keeping = [k for k, meta in src_metadata.items() if meta["id"] not in article_ids]
+
+    def take(faiss_ids):
+        if not faiss_ids:
+            return np.empty((0, embedding_dim), dtype='float32')
+        return src_index.reconstruct_batch(np.array(faiss_ids, dtype='int64'))
+
+    rest = faiss.IndexFlatL2(embedding_dim)
+    rest.add(take(keeping))
+    rest_metadata = {i: src_metadata[k] for i, k in enumerate(keeping)}
+    return take(moving), [src_metadata[k] for k in moving], rest, rest_metadata
+
+def _append(dst_index, dst_metadata: Dict[int, dict], vectors, metas: List[dict]) -> List[int]:
+    start = dst_index.ntotal
+    dst_index.add(vectors)
+    for offset, meta in enumerate(metas):
+        dst_metadata[start + offset] = meta
+    return list(range(start, start + len(metas)))
+
+def archive_vectors(article_ids: List[int]) -> int:
+    """
+    Moves the vectors of archived articles from the live index to the archive
+    index. The live index is rebuilt without them (and without stale vectors),
+    so FAISS ids of live articles change. Returns the number of vectors moved.
+    """
+    global index, metadata_store
+    ids = set(article_ids)
+    with index_lock:
+        if not any(meta["id"] in ids for meta in metadata_store.values()):
+            return 0
+        with stage("faiss.archive"):
+            vectors, metas, index, metadata_store = _split(index, metadata_store, ids)
+            _append(archive_index, archive_metadata_store, vectors, metas)
+        save_index()
+        save_archive_index()
+    return len(metas)
+
+def unarchive_vectors(article_ids: List[int]) -> List[int]:
+    """
+    Moves the vectors of restored articles back to the live index.
+    Returns their new FAISS IDs.
+    """
+    global archive_index, archive_metadata_store
+    ids = set(article_ids)
+    with index_lock:
+        if not any(meta["id"] in ids for meta in archive_metadata_store.values()):
+            return []
+        with stage("faiss.archive"):
+            vectors, metas, archive_index, archive_metadata_store = _split(archive_index, archive_metadata_store, ids)
+            faiss_ids = _append(index, metadata_store, vectors, metas)
+        save_index()
+        save_archive_index()
+    return faiss_ids
+
+def search_similar(query: str, n_results: int = 5, archived: bool = False, embedding: Optional[np.ndarray] = None) -> List[dict]:
+    """
+    Searches for similar articles in the FAISS index, or in the archive
+    index with archived=True. Pass embedding if the query is already encoded.
+    """
+    search_index, search_metadata = (archive_index, archive_metadata_store) if archived else (index, metadata_store)
+    if search_index.ntotal == 0:
+        return []
+
+    if embedding is None:
+        embedding = encoder.encode([query])
+    with stage("faiss.search"):
+        D, I = search_index.search(np.array(embedding).astype('float32'), k=n_results)
     
     results = []
     for i in range(len(I[0])):
         idx = I[0][i]
-        if idx != -1 and idx in metadata_store:
-            meta = metadata_store[idx]
+        if idx != -1 and idx in search_metadata:
+            meta = search_metadata[idx]
             results.append({
                 "id": meta["id"],
                 "score": float(D[0][i]),
@@ -80,3 +236,13 @@ def search_similar(query: str, n_results: int = 5) -> List[dict]:
             })
             
     return results
+
+async def search_similar_async(query: str, n_results: int = 5, archived: bool = False) -> List[dict]:
+    """
+    search_similar for the event loop: the query joins the next embedding
+    batch without holding an executor thread, then FAISS runs on the CPU pool.
+    """
+    if (archive_index if archived else index).ntotal == 0:
+        return []
+    embedding = await encoder.encode_async([query])
+    return await run_cpu(search_similar, query, n_results, archived, embedding)
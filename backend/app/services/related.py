@@ -0,0 +1,110 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from app.database import engine
+from app.metrics import stage
+from app.models import RelatedArticle
+from app.services import rag
+
+# Number of neighbours stored per article
+RELATED_K = 8
+# Rows reconstructed and searched per batch during a full rebuild
+REBUILD_BATCH_SIZE = 1024
+
+def _to_similarity(distance: float) -> float:
+    # Embeddings are unit-normalized, so squared L2 distance = 2 - 2 * cosine
+    return 1.0 - float(distance) / 2.0
+
+def _neighbours(vectors: np.ndarray, query_ids: List[int]) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    k-NN search for a block of vectors against the whole index.
+    Returns article_id -> [(related_article_id, score), ...] sorted by score.
+    """
+    # Over-fetch: the article itself and stale duplicates are filtered out below
+    k = min(RELATED_K * 2 + 1, rag.index.ntotal)
+    with stage("faiss.search"):
+        D, I = rag.index.search(vectors, k=k)
+
+    result = {}
+    for row, faiss_id in enumerate(query_ids):
+        article_id = rag.metadata_store[faiss_id]["id"]
+        seen = {article_id}
+        neighbours = []
+        for distance, idx in zip(D[row], I[row]):
+            if idx == -1 or idx not in rag.metadata_store:
+                continue
+            related_id = rag.metadata_store[idx]["id"]
+            if related_id in seen:
+                continue
+            seen.add(related_id)
+            neighbours.append((related_id, _to_similarity(distance)))
+            if len(neighbours) == RELATED_K:
+                break
+        result[article_id] = neighbours
+    return result
+
+def _store(session: Session, article_id: int, neighbours: List[Tuple[int, float]]):
+    session.execute(delete(RelatedArticle).where(RelatedArticle.article_id == article_id))
+    for rank, (related_id, score) in enumerate(neighbours):
+        session.add(RelatedArticle(article_id=article_id, rank=rank, related_article_id=related_id, score=score))
+
+def rebuild_related_articles() -> int:
+    """
+    Recomputes every neighbour list with a batched k-NN self-join over the index.
+    Returns the number of articles processed.
+    """
+    total = rag.index.ntotal
+    if total == 0:
+        return 0
+
+    processed = 0
+    with Session(engine) as session:
+        for start in range(0, total, REBUILD_BATCH_SIZE):
+            count = min(REBUILD_BATCH_SIZE, total - start)
+            vectors = rag.index.reconstruct_n(start, count)
+            query_ids = [i for i in range(start, start + count) if i in rag.metadata_store]
+            if not query_ids:
+                continue
+            vectors = vectors[[i - start for i in query_ids]]
+            for article_id, neighbours in _neighbours(vectors, query_ids).items():
+                _store(session, article_id, neighbours)
+                processed += 1
+            session.commit()
+    return processed
+
+def refresh_related_for(article_id: int):
+    """
+    Incremental refresh after an article is (re-)indexed: stores its own
+    neighbour list and inserts it into the lists of neighbours it now outranks.
+    """
+    with rag.index_lock:
+        # Looked up under the lock: moving vectors between tiers renumbers the
+        # live index, so a FAISS id taken earlier may now be another article's
+        faiss_id = rag.live_faiss_id(article_id)
+        if faiss_id is None:
+            return # Removed or moved to the archive index since it was indexed
+        vector = rag.index.reconstruct(faiss_id).reshape(1, -1)
+        article_id, neighbours = next(iter(_neighbours(vector, [faiss_id]).items()))
+
+    with Session(engine) as session:
+        _store(session, article_id, neighbours)
+
+        for related_id, score in neighbours:
+            current = session.exec(
+                select(RelatedArticle.related_article_id, RelatedArticle.score)
+                .where(RelatedArticle.article_id == related_id)
+                .order_by(RelatedArticle.rank)
+            ).all()
+            entries = [(rid, rscore) for rid, rscore in current if rid != article_id]
+            if len(entries) >= RELATED_K and entries[-1][1] >= score:
+                continue
+            entries.append((article_id, score))
+            entries.sort(key=lambda e: e[1], reverse=True)
+            _store(session, related_id, entries[:RELATED_K])
+
+        session.commit()
+
+if __name__ == "__main__":
+    count = rebuild_related_articles()
+    print(f"Rebuilt related articles for {count} articles")
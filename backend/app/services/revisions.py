@@ -0,0 +1,219 @@
+"""
+Revision history for the editable fields of an Article (title, summary,
+content, tags).
+
+Every flush that changes one of those fields appends an ArticleRevision
+holding the new state. Most revisions are deltas against the previous one:
+a word-level diff of the changed text fields, stored compressed. Every
+REVISION_SNAPSHOT_INTERVAL revisions (or whenever a delta would be nearly as
+large as the full text, e.g. after a regenerate rewrote everything) a full
+snapshot is stored instead, so rebuilding any revision applies at most
+REVISION_SNAPSHOT_INTERVAL - 1 deltas after the nearest snapshot.
+
+History starts lazily: the first change to an article also records its
+previous state as revision 1 ("original").
+
+Recording happens in a before_flush hook, so every writer (endpoints,
+background jobs, async sessions) is covered. Writers label the change with
+set_revision_action(session, action, author).
+"""
+import difflib
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from app.models import Article, ArticleRevision
+
+TRACKED_FIELDS = ("title", "summary", "content", "tags")
+REVISION_SNAPSHOT_INTERVAL = int(os.environ.get("REVISION_SNAPSHOT_INTERVAL", "10"))
+# Store a snapshot instead when the delta is larger than this share of it
+SNAPSHOT_DELTA_RATIO = 0.5
+
+# Words and the whitespace between them; "".join(tokens) == text
+_TOKEN = re.compile(r"\S+|\s+")
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text or "")
+
+def encode_delta(old: Optional[str], new: Optional[str]):
+    """
+    Word-level edit script turning old into new: positive ints copy that many
+    tokens, negative ints skip them, strings are inserted. None values are
+    stored whole as {"v": value}.
+    """
+    if old is None or new is None:
+        return {"v": new}
+    a, b = _tokens(old), _tokens(new)
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if tag in ("delete", "replace"):
+            ops.append(-(i2 - i1))
+        if tag in ("insert", "replace"):
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+def apply_delta(old: Optional[str], delta) -> Optional[str]:
+    if isinstance(delta, dict):
+        return delta["v"]
+    tokens = _tokens(old)
+    out, pos = [], 0
+    for op in delta:
+        if isinstance(op, str):
+            out.append(op)
+        elif op > 0:
+            out.extend(tokens[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    return "".join(out)
+
+def _state(article: Article) -> Dict[str, Optional[str]]:
+    return {field: getattr(article, field) for field in TRACKED_FIELDS}
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def _chain(session: Session, article_id: int, revision: Optional[int] = None) -> List[ArticleRevision]:
+    """
+    Rows needed to rebuild a revision (the latest if None): the nearest
+    snapshot at or before it and the deltas after it.
+    """
+    snapshot_query = select(func.max(ArticleRevision.revision)).where(
+        ArticleRevision.article_id == article_id, ArticleRevision.kind == "snapshot"
+    )
+    if revision is not None:
+        snapshot_query = snapshot_query.where(ArticleRevision.revision <= revision)
+    start = session.execute(snapshot_query).scalar()
+    if start is None:
+        return []
+    query = select(ArticleRevision).where(
+        ArticleRevision.article_id == article_id, ArticleRevision.revision >= start
+    )
+    if revision is not None:
+        query = query.where(ArticleRevision.revision <= revision)
+    return list(session.execute(query.order_by(ArticleRevision.revision)).scalars().all())
+
+def _rebuild(chain: List[ArticleRevision]) -> Dict[str, Optional[str]]:
+    state = dict(json.loads(chain[0].data))
+    for row in chain[1:]:
+        for field, delta in json.loads(row.data).items():
+            state[field] = apply_delta(state.get(field), delta)
+    return state
+
+def reconstruct(session: Session, article_id: int, revision: int) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Tracked fields of an article as of the given revision, or None if it
+    does not exist.
+    """
+    chain = _chain(session, article_id, revision)
+    if not chain or chain[-1].revision != revision:
+        return None
+    return _rebuild(chain)
+
+def list_revisions(session: Session, article_id: int) -> List[dict]:
+    rows = session.execute(
+        select(ArticleRevision.revision, ArticleRevision.kind, ArticleRevision.action, ArticleRevision.author, ArticleRevision.created_at)
+        .where(ArticleRevision.article_id == article_id)
+        .order_by(ArticleRevision.revision.desc())
+    ).all()
+    return [
+        {"revision": r.revision, "kind": r.kind, "action": r.action, "author": r.author, "created_at": r.created_at}
+        for r in rows
+    ]
+
+def diff_revisions(old: Dict[str, Optional[str]], new: Dict[str, Optional[str]], old_label: str, new_label: str) -> Dict[str, str]:
+    """
+    Unified diff per changed field, for display.
+    """
+    diffs = {}
+    for field in TRACKED_FIELDS:
+        if old.get(field) == new.get(field):
+            continue
+        diffs[field] = "".join(difflib.unified_diff(
+            (old.get(field) or "").splitlines(keepends=True),
+            (new.get(field) or "").splitlines(keepends=True),
+            fromfile=f"{field}@{old_label}", tofile=f"{field}@{new_label}",
+        ))
+    return diffs
+
+def set_revision_action(session, action: str, author: Optional[str] = None):
+    """
+    Labels the revisions recorded by this session's next flushes.
+    Works for both Session and AsyncSession.
+    """
+    session.info["revision_action"] = action
+    session.info["revision_author"] = author
+
+def _add_revision(session: Session, article_id: int, revision: int, kind: str, action: str, author: Optional[str], data):
+    session.add(ArticleRevision(
+        article_id=article_id, revision=revision, kind=kind, action=action,
+        author=author, data=_dumps(data), created_at=datetime.utcnow(),
+    ))
+
+def _record(session: Session, article: Article):
+    insp = inspect(article)
+    new_state = _state(article)
+    old_state, changed = {}, False
+    for field in TRACKED_FIELDS:
+        history = insp.attrs[field].history
+        if history.deleted:
+            old_state[field] = history.deleted[0]
+            changed = changed or history.deleted[0] != new_state[field]
+        elif history.added:
+            old_state[field] = None # Previous value was never loaded
+            changed = True
+        else:
+            old_state[field] = new_state[field]
+    if not changed:
+        return
+
+    action = session.info.get("revision_action", "edit")
+    author = session.info.get("revision_author")
+    chain = _chain(session, article.id)
+    if chain:
+        last = chain[-1].revision
+        previous = _rebuild(chain)
+        since_snapshot = last - chain[0].revision
+    else:
+        # First change: keep the state it is replacing as revision 1
+        _add_revision(session, article.id, 1, "snapshot", "original", None, old_state)
+        last, previous, since_snapshot = 1, old_state, 0
+
+    if previous == new_state:
+        return
+    delta = {f: encode_delta(previous.get(f), new_state[f]) for f in TRACKED_FIELDS if previous.get(f) != new_state[f]}
+    delta_json, snapshot_json = _dumps(delta), _dumps(new_state)
+    if since_snapshot + 1 >= REVISION_SNAPSHOT_INTERVAL or len(delta_json) > len(snapshot_json) * SNAPSHOT_DELTA_RATIO:
+        _add_revision(session, article.id, last + 1, "snapshot", action, author, new_state)
+    else:
+        _add_revision(session, article.id, last + 1, "delta", action, author, delta)
+
+@event.listens_for(Session, "before_flush")
+def _record_revisions(session, flush_context, instances):
+    articles = [obj for obj in session.dirty if isinstance(obj, Article) and obj.id is not None]
+    if not articles:
+        return
+    with session.no_autoflush:
+        for article in articles:
+            if session.is_modified(article, include_collections=False):
+                _record(session, article)
+
+def restore_fields(article: Article, state: Dict[str, Optional[str]]) -> List[str]:
+    """
+    Applies a reconstructed state to the article. Returns the changed fields.
+    """
+    changed = []
+    for field in TRACKED_FIELDS:
+        value = state.get(field)
+        if field == "content" and value is None:
+            continue # Non-nullable; never stored as None
+        if getattr(article, field) != value:
+            setattr(article, field, value)
+            changed.append(field)
+    return changed
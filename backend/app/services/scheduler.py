@@ -0,0 +1,243 @@
+"""
+Adaptive feed polling. Each Source gets its own polling interval, learned
+from its FeedHistory: busy feeds are polled more often, feeds that keep
+returning nothing new (or 304 Not Modified) and failing feeds back off.
+
+Sources wait in a priority queue ordered by their next due time. Every tick
+at most POLL_BUDGET feeds are fetched; when more are due than the budget
+allows, the ones expected to have the most new articles waiting
+(learned publishing rate x time since the last poll) go first.
+
+Enabled with POLL_SCHEDULER_ENABLED=1.
+"""
+import asyncio
+import heapq
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import async_engine
+from app.models import FeedHistory, Source
+from app.services.http_client import get_http_client
+from app.services.ingestion import ingest_feed_content
+
+POLL_SCHEDULER_ENABLED = os.environ.get("POLL_SCHEDULER_ENABLED", "0") == "1"
+# Seconds between scheduler ticks
+POLL_TICK_SECONDS = int(os.environ.get("POLL_TICK_SECONDS", "60"))
+# Feeds fetched per tick at most
+POLL_BUDGET = int(os.environ.get("POLL_BUDGET", "4"))
+# Bounds of the learned per-source interval, in seconds
+POLL_MIN_INTERVAL = int(os.environ.get("POLL_MIN_INTERVAL", "300"))
+POLL_MAX_INTERVAL = int(os.environ.get("POLL_MAX_INTERVAL", str(6 * 3600)))
+POLL_DEFAULT_INTERVAL = int(os.environ.get("POLL_DEFAULT_INTERVAL", "1800"))
+# The interval aims at finding about this many new articles per poll
+TARGET_ARTICLES_PER_POLL = float(os.environ.get("POLL_TARGET_ARTICLES", "2"))
+# FeedHistory rows per source used to learn its rate
+HISTORY_WINDOW = 20
+# Interval growth per consecutive empty poll, and per consecutive error
+EMPTY_BACKOFF = 1.5
+ERROR_BACKOFF = 2.0
+
+# source_id -> schedule state
+schedule: Dict[int, dict] = {}
+# (next_due, source_id) min-heap; entries whose next_due no longer matches are stale
+_queue: List[Tuple[float, int]] = []
+_task: Optional[asyncio.Task] = None
+
+def _clamp(interval: float) -> float:
+    return max(POLL_MIN_INTERVAL, min(POLL_MAX_INTERVAL, interval))
+
+def learn_interval(history: List[FeedHistory]) -> Tuple[float, float]:
+    """
+    Returns (interval_seconds, articles_per_second) from a source's recent
+    FeedHistory, newest first.
+    """
+    if not history:
+        return POLL_DEFAULT_INTERVAL, 0.0
+
+    errors = 0
+    for h in history:
+        if h.status != "error":
+            break
+        errors += 1
+    empty = 0
+    for h in history:
+        if h.status != "success" or h.articles_count:
+            break
+        empty += 1
+
+    # Articles found between the oldest and newest successful polls; the
+    # oldest poll's own count covers time before the window, so skip it
+    successes = [h for h in history if h.status == "success"]
+    rate = 0.0
+    if len(successes) >= 2:
+        span = (successes[0].fetched_at - successes[-1].fetched_at).total_seconds()
+        if span > 0:
+            rate = sum(h.articles_count for h in successes[:-1]) / span
+
+    if errors:
+        return _clamp(POLL_DEFAULT_INTERVAL * ERROR_BACKOFF ** errors), rate
+    interval = TARGET_ARTICLES_PER_POLL / rate if rate > 0 else POLL_DEFAULT_INTERVAL
+    return _clamp(interval * EMPTY_BACKOFF ** empty), rate
+
+def expected_new_articles(state: dict, now: float) -> float:
+    """
+    Priority among due sources: articles likely waiting since the last poll.
+    Never-polled sources come first.
+    """
+    if state["last_polled"] is None:
+        return float("inf")
+    rate = state["rate"] or 1.0 / POLL_DEFAULT_INTERVAL
+    return rate * (now - state["last_polled"])
+
+def _push(state: dict):
+    heapq.heappush(_queue, (state["next_due"], state["source_id"]))
+
+async def _load_history(session: AsyncSession, source_id: int) -> List[FeedHistory]:
+    result = await session.execute(
+        select(FeedHistory)
+        .where(FeedHistory.source_id == source_id)
+        .order_by(FeedHistory.fetched_at.desc())
+        .limit(HISTORY_WINDOW)
+    )
+    return list(result.scalars().all())
+
+async def sync_sources():
+    """
+    Adds newly created sources to the queue (learning their interval from
+    any existing FeedHistory) and drops deleted ones.
+    """
+    now = time.time()
+    async with AsyncSession(async_engine) as session:
+        sources = (await session.execute(select(Source))).scalars().all()
+        current = {s.id for s in sources}
+        for source_id in list(schedule):
+            if source_id not in current:
+                del schedule[source_id]
+
+        for source in sources:
+            state = schedule.get(source.id)
+            if state is not None:
+                state["name"], state["feed_url"] = source.name, source.feed_url
+                continue
+            history = await _load_history(session, source.id)
+            interval, rate = learn_interval(history)
+            # fetched_at is naive UTC
+            last_polled = history[0].fetched_at.replace(tzinfo=timezone.utc).timestamp() if history else None
+            state = schedule[source.id] = {
+                "source_id": source.id,
+                "name": source.name,
+                "feed_url": source.feed_url,
+                "interval": interval,
+                "rate": rate,
+                "last_polled": last_polled,
+                "next_due": (last_polled + interval) if last_polled else now,
+                "last_status": history[0].status if history else None,
+                "etag": None,
+                "last_modified": None,
+            }
+            _push(state)
+
+async def poll_source(state: dict):
+    """
+    Fetches one feed (conditionally, with the validators of the previous
+    fetch), ingests new entries, records a FeedHistory row and reschedules
+    the source with its re-learned interval.
+    """
+    status, count, details = "success", 0, None
+    try:
+        headers = {}
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+        response = await get_http_client().get(state["feed_url"], headers=headers)
+        if response.status_code == 304:
+            details = "Not modified"
+        else:
+            response.raise_for_status()
+            state["etag"] = response.headers.get("ETag")
+            state["last_modified"] = response.headers.get("Last-Modified")
+            count = await ingest_feed_content(response.content, state["name"])
+    except Exception as e:
+        status, details = "error", str(e)[:500]
+        print(f"Error polling source {state['name']}: {e}")
+
+    async with AsyncSession(async_engine) as session:
+        session.add(FeedHistory(source_id=state["source_id"], status=status, articles_count=count, details=details))
+        await session.commit()
+        history = await _load_history(session, state["source_id"])
+
+    state["interval"], state["rate"] = learn_interval(history)
+    state["last_polled"] = time.time()
+    state["last_status"] = status
+    state["next_due"] = state["last_polled"] + state["interval"]
+    _push(state)
+
+async def tick() -> List[int]:
+    """
+    Polls up to POLL_BUDGET due sources, highest expected yield first.
+    Returns the polled source ids.
+    """
+    await sync_sources()
+    now = time.time()
+    due = []
+    while _queue and _queue[0][0] <= now:
+        next_due, source_id = heapq.heappop(_queue)
+        state = schedule.get(source_id)
+        if state is None or state["next_due"] != next_due:
+            continue # Deleted or rescheduled since it was queued
+        due.append(state)
+
+    chosen = heapq.nlargest(POLL_BUDGET, due, key=lambda s: expected_new_articles(s, now))
+    chosen_ids = {s["source_id"] for s in chosen}
+    for state in due:
+        if state["source_id"] not in chosen_ids:
+            _push(state) # Still due; competes again next tick
+
+    await asyncio.gather(*(poll_source(state) for state in chosen))
+    return [s["source_id"] for s in chosen]
+
+async def run_scheduler():
+    while True:
+        try:
+            await tick()
+        except Exception as e:
+            print(f"Polling scheduler tick failed: {e}")
+        await asyncio.sleep(POLL_TICK_SECONDS)
+
+def start_scheduler():
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(run_scheduler())
+
+async def stop_scheduler():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+def schedule_snapshot() -> List[dict]:
+    """
+    Per-source schedule for GET /scheduler, soonest first.
+    """
+    now = time.time()
+    rows = []
+    for state in sorted(schedule.values(), key=lambda s: s["next_due"]):
+        rows.append({
+            "source_id": state["source_id"],
+            "name": state["name"],
+            "interval_seconds": round(state["interval"]),
+            "articles_per_hour": round(state["rate"] * 3600, 2),
+            "last_polled": datetime.utcfromtimestamp(state["last_polled"]) if state["last_polled"] else None,
+            "last_status": state["last_status"],
+            "due_in_seconds": round(state["next_due"] - now),
+            "expected_new_articles": None if state["last_polled"] is None else round(expected_new_articles(state, now), 2),
+        })
+    return rows
@@ -1,24 +1,238 @@
+import asyncio
+import os
+import re
+from typing import Dict
+from urllib.parse import urlsplit
 import requests
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+from app.metrics import stage
+from app.services import page_cache
+from app.services.executors import run_cpu, run_blocking
+from app.services.http_client import get_http_client, USER_AGENT
+
+# Simultaneous requests to the same host
+PER_DOMAIN_CONCURRENCY = int(os.environ.get("SCRAPER_PER_DOMAIN_CONCURRENCY", "2"))
+# Minimum seconds between the start of two requests to the same host
+PER_DOMAIN_DELAY = float(os.environ.get("SCRAPER_PER_DOMAIN_DELAY", "0.5"))
+
+# Elements that never hold article text
+BOILERPLATE_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg", "button", "figure"}
+# Words in class/id names of cookie banners, share bars, related links,
+# newsletters... Matched as whole words of a name split on spaces, "-" and
+# "_": "share-bar" matches, "shareable" and "subscriber-content" don't
+BOILERPLATE_PATTERN = re.compile(
+    r"(?:^|[\s_-])(?:cookies?|consent|banner|share|sharing|social|related|recommended|recommendations?|"
+    r"newsletters?|subscribe|subscription|promo|promotion|advert|advertisement|ads|sponsor|sponsored|"
+    r"comments?|footer|sidebar|breadcrumbs?|popup|modal|paywall|outbrain|taboola|tags|author-bio)(?=$|[\s_-])",
+    re.IGNORECASE,
+)
+# Explicit article body containers, checked before the scoring heuristic
+CONTENT_XPATHS = ['//*[@itemprop="articleBody"]', "//article", "//main", '//*[@role="main"]']
+MIN_PARAGRAPH_CHARS = 40
+MAX_LINK_DENSITY = 0.5
+# Bump when extract_text changes so cached extractions are recomputed
+EXTRACTOR_VERSION = 2
+
+_domain_semaphores: Dict[str, asyncio.Semaphore] = {}
+# Next time a request to the host may start (event loop clock)
+_domain_next_slot: Dict[str, float] = {}
+
+def _text(element) -> str:
+    return " ".join(element.text_content().split())
+
+def _link_density(element, text: str) -> float:
+    link_length = sum(len(_text(a)) for a in element.iter("a"))
+    return link_length / (len(text) or 1)
+
+def _strip_boilerplate(root, keep=frozenset()):
+    # Walk the tree once, skipping the subtrees of elements marked for removal.
+    # Elements in keep (the article container and its ancestors) are never dropped.
+    to_drop = []
+    stack = [root]
+    while stack:
+        element = stack.pop()
+        if not isinstance(element.tag, str):
+            # Comments and processing instructions
+            to_drop.append(element)
+            continue
+        if element not in keep:
+            if element.tag in BOILERPLATE_TAGS:
+                to_drop.append(element)
+                continue
+            # Never drop the body or the main article container itself
+            if element.tag not in ("html", "body", "article", "main"):
+                marker = f"{element.get('class', '')} {element.get('id', '')}"
+                if marker != " " and BOILERPLATE_PATTERN.search(marker):
+                    to_drop.append(element)
+                    continue
+        stack.extend(element)
+
+    for element in to_drop:
+        if element.getparent() is not None:
+            # drop_tree keeps the element's tail text in the parent
+            element.drop_tree()
+
+def _paragraph_chars(element) -> int:
+    return sum(len(_text(p)) for p in element.iter("p"))
+
+def _explicit_container(root):
+    """
+    The first explicit article body container with enough paragraph text.
+    """
+    for xpath in CONTENT_XPATHS:
+        for candidate in root.xpath(xpath):
+            if _paragraph_chars(candidate) > 200:
+                return candidate
+    return None
+
+def _best_container(root):
+    """
+    The element holding the article body: an explicit container if it has
+    enough paragraph text, otherwise the parent with the most paragraph text.
+    """
+    explicit = _explicit_container(root)
+    if explicit is not None:
+        return explicit
+
+    scores = {}
+    for p in root.iter("p"):
+        length = len(_text(p))
+        parent = p.getparent()
+        if length < MIN_PARAGRAPH_CHARS or parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + length
+
+    if not scores:
+        return root
+    return max(scores, key=scores.get)
+
+def extract_text(html: bytes) -> str:
+    """
+    Main-content extraction on lxml's C parser: strips boilerplate
+    (navigation, footers, cookie banners, share and related-link blocks),
+    picks the article container and returns its substantial paragraphs.
+    """
+    if not html or not html.strip():
+        return ""
+    root = lxml_html.fromstring(html)
+    # Chosen before stripping so the body container survives whatever its
+    # own class names or wrapping elements (e.g. a page-wide <form>) look like
+    explicit = _explicit_container(root)
+    keep = frozenset([explicit, *explicit.iterancestors()]) if explicit is not None else frozenset()
+    _strip_boilerplate(root, keep)
+    container = explicit if explicit is not None and _paragraph_chars(explicit) > 200 else _best_container(root)
+
+    paragraphs = []
+    for p in container.iter("p"):
+        text = _text(p)
+        if len(text) < MIN_PARAGRAPH_CHARS or _link_density(p, text) > MAX_LINK_DENSITY:
+            continue
+        paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+def _fetch_sync(url: str, entry) -> dict:
+    headers = {'User-Agent': USER_AGENT}
+    headers.update(page_cache.conditional_headers(entry))
+    with stage("scraper.fetch"):
+        response = requests.get(url, headers=headers, timeout=10)
+    if response.status_code == 304 and entry:
+        return page_cache.mark_revalidated(url, entry)
+    response.raise_for_status()
+    return page_cache.store(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
 
 def scrape_url(url: str) -> str:
     """
-    Fetches the URL and extracts the text content from paragraph tags.
+    Fetches the URL and extracts the main article text. Raises ValueError
+    rather than returning empty text.
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        entry = page_cache.get_entry(url)
+        if entry is None or not page_cache.is_fresh(entry):
+            entry = _fetch_sync(url, entry)
+
+        text = page_cache.cached_extraction(entry, EXTRACTOR_VERSION)
+        if not text:
+            html = page_cache.load_html(url)
+            if html is None:
+                # Body missing or corrupt: fetch it again, unconditionally
+                page_cache.discard(url)
+                entry = _fetch_sync(url, None)
+                html = page_cache.load_html(url)
+            with stage("scraper.extract"):
+                text = extract_text(html or b"")
+            if not text:
+                raise ValueError("No article text found on page")
+            page_cache.save_extraction(url, entry, EXTRACTOR_VERSION, text)
+        return text
+    except Exception as e:
+        print(f"Error scraping URL {url}: {e}")
+        raise e
+
+def domain_of(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+def _domain_semaphore(url: str) -> asyncio.Semaphore:
+    domain = domain_of(url)
+    semaphore = _domain_semaphores.get(domain)
+    if semaphore is None:
+        semaphore = _domain_semaphores[domain] = asyncio.Semaphore(PER_DOMAIN_CONCURRENCY)
+    return semaphore
+
+async def _wait_for_domain_slot(url: str):
+    # Reserve the next slot before sleeping so concurrent callers queue up behind it
+    domain = domain_of(url)
+    now = asyncio.get_running_loop().time()
+    start = max(now, _domain_next_slot.get(domain, 0.0))
+    _domain_next_slot[domain] = start + PER_DOMAIN_DELAY
+    if start > now:
+        await asyncio.sleep(start - now)
+
+async def fetch_page(url: str, use_cache: bool = True) -> dict:
+    """
+    Returns the page cache entry for the URL, revalidating it with the origin
+    (If-None-Match / If-Modified-Since) once it is older than
+    PAGE_CACHE_FRESH_SECONDS; use_cache=False always downloads the page.
+    Requests go through the shared keep-alive client, with at most
+    PER_DOMAIN_CONCURRENCY in flight per host, started at least
+    PER_DOMAIN_DELAY seconds apart.
+    """
+    entry = await run_blocking(page_cache.get_entry, url) if use_cache else None
+    if entry is not None and page_cache.is_fresh(entry):
+        return entry
+
+    async with _domain_semaphore(url):
+        await _wait_for_domain_slot(url)
+        with stage("scraper.fetch"):
+            response = await get_http_client().get(url, headers=page_cache.conditional_headers(entry))
+        if response.status_code == 304 and entry:
+            return await run_blocking(page_cache.mark_revalidated, url, entry)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Simple heuristic: extract all text from <p> tags
-        paragraphs = soup.find_all('p')
-        text_content = "\n\n".join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
-        
-        return text_content
+        return await run_blocking(
+            page_cache.store, url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        )
+
+async def scrape_url_async(url: str) -> str:
+    """
+    scrape_url for async handlers: fetches through the page cache and parses
+    on the CPU executor. An unchanged page reuses its cached extraction.
+    Raises ValueError rather than returning empty text.
+    """
+    try:
+        entry = await fetch_page(url)
+        text = page_cache.cached_extraction(entry, EXTRACTOR_VERSION)
+        if not text:
+            html = await run_blocking(page_cache.load_html, url)
+            if html is None:
+                # Body missing or corrupt: fetch it again, unconditionally
+                await run_blocking(page_cache.discard, url)
+                entry = await fetch_page(url, use_cache=False)
+                html = await run_blocking(page_cache.load_html, url)
+            with stage("scraper.extract"):
+                text = await run_cpu(extract_text, html or b"")
+            if not text:
+                raise ValueError("No article text found on page")
+            await run_blocking(page_cache.save_extraction, url, entry, EXTRACTOR_VERSION, text)
+        return text
     except Exception as e:
         print(f"Error scraping URL {url}: {e}")
         raise e
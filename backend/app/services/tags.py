@@ -0,0 +1,63 @@
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+from app.models import Article, ArticleTag, Tag
+
+def normalize_tags(tags: Optional[str]) -> List[str]:
+    """
+    Splits a comma-separated tag string into unique, lowercased tag names.
+    """
+    if not tags:
+        return []
+    names = []
+    for t in tags.split(","):
+        name = t.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def get_or_create_tags(session: Session, names: List[str]) -> Dict[str, Tag]:
+    """
+    Returns name -> Tag for the given normalized names, creating missing ones.
+    """
+    if not names:
+        return {}
+    tags = {t.name: t for t in session.exec(select(Tag).where(Tag.name.in_(names))).all()}
+    for name in names:
+        if name not in tags:
+            tags[name] = Tag(name=name)
+            session.add(tags[name])
+    session.flush()
+    return tags
+
+def sync_article_tags(session: Session, article: Article):
+    """
+    Mirrors Article.tags into the ArticleTag join table.
+    Does not commit; the caller owns the transaction.
+    """
+    session.execute(delete(ArticleTag).where(ArticleTag.article_id == article.id))
+    tags = get_or_create_tags(session, normalize_tags(article.tags))
+    for tag in tags.values():
+        session.add(ArticleTag(article_id=article.id, tag_id=tag.id))
+
+def tag_facets(session: Session, status: Optional[str] = None, limit: int = 100) -> List[dict]:
+    """
+    Article counts per tag and status from one aggregate query, most used tags first.
+    """
+    statement = (
+        select(Tag.name, Article.status, func.count())
+        .select_from(ArticleTag)
+        .join(Tag, Tag.id == ArticleTag.tag_id)
+        .join(Article, Article.id == ArticleTag.article_id)
+        .group_by(Tag.name, Article.status)
+    )
+    if status:
+        statement = statement.where(Article.status == status)
+
+    facets: Dict[str, dict] = {}
+    for name, article_status, count in session.execute(statement).all():
+        facet = facets.setdefault(name, {"tag": name, "total": 0, "counts": {}})
+        facet["counts"][article_status] = count
+        facet["total"] += count
+
+    return sorted(facets.values(), key=lambda f: (-f["total"], f["tag"]))[:limit]
@@ -0,0 +1,82 @@
+"""
+GET /articles: full unpaginated list vs keyset pages with the list projection.
+
+Run from backend/:
+    python -m benchmarks.bench_article_list [n_articles ...]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlmodel import Session, create_engine
+from app import database
+from app.pagination import parse_fields, query_article_page
+
+PAGE_SIZE = 50
+
+def populate(engine, n_articles):
+    rng = random.Random(42)
+    base = datetime(2024, 1, 1)
+    body = "Lorem ipsum dolor sit amet. " * 150
+    rows = [
+        {
+            "title": f"Artículo {i}",
+            "content": body,
+            "original_content": body,
+            "url": f"https://example.com/{i}",
+            "source": f"Fuente {i % 20}",
+            "summary": body[:200],
+            "status": rng.choice(["published", "published", "draft", "archived"]),
+            "published_at": base + timedelta(minutes=i),
+        }
+        for i in range(n_articles)
+    ]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO article (title, content, original_content, url, source, summary, status, published_at, created_at) "
+                "VALUES (:title, :content, :original_content, :url, :source, :summary, :status, :published_at, CURRENT_TIMESTAMP)"
+            ),
+            rows,
+        )
+
+def call(session, status, limit, cursor, fields):
+    # Same work as GET /articles on a cache miss: query + JSON serialization
+    start = time.perf_counter()
+    rows, next_cursor = query_article_page(session, status, limit, cursor, parse_fields(fields))
+    payload = json.dumps(jsonable_encoder(rows))
+    return (time.perf_counter() - start) * 1000, len(payload), next_cursor
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [10_000, 100_000]
+    for n_articles in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            database.engine = engine
+            database.create_db_and_tables()
+            populate(engine, n_articles)
+
+            with Session(engine) as session:
+                full_ms, full_bytes, _ = call(session, status="published", limit=None, cursor=None, fields=None)
+
+                first_ms, first_bytes, cursor = call(session, status="published", limit=PAGE_SIZE, cursor=None, fields="list")
+                # Walk 20 pages deep to show keyset pages don't slow down with depth
+                deep_ms = []
+                for _ in range(20):
+                    ms, _, cursor = call(session, status="published", limit=PAGE_SIZE, cursor=cursor, fields="list")
+                    deep_ms.append(ms)
+
+            print(
+                f"n={n_articles:>7} full: {full_ms:8.1f}ms {full_bytes / 1e6:7.2f}MB | "
+                f"page 1: {first_ms:6.2f}ms {first_bytes / 1e3:6.1f}KB | "
+                f"pages 2-21 mean: {sum(deep_ms) / len(deep_ms):6.2f}ms"
+            )
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compressed article bodies: database size, list-query and detail-view latency
+with plain TEXT bodies (before), zstd/zlib-compressed bodies, and zstd with
+a dictionary trained on the corpus.
+
+Run from backend/:
+    python -m benchmarks.bench_compression [n_articles]
+"""
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlmodel import Session, create_engine
+from app import compression, database
+from app.migrations import recompress_article_bodies
+from app.models import Article
+from app.pagination import parse_fields, query_article_page
+from app.services.scraper import extract_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def sentences():
+    # Natural-language sentences from the saved pages and RSS fixtures
+    found = []
+    for path in glob.glob(os.path.join(FIXTURES, "html", "*.html")):
+        with open(path, "rb") as f:
+            found += [s.strip() + "." for s in extract_text(f.read()).split(".") if len(s.strip()) > 20]
+    for path in glob.glob(os.path.join(FIXTURES, "rss", "*.xml")):
+        with open(path, encoding="utf-8") as f:
+            found += [line.strip()[13:-14] for line in f if line.strip().startswith("<description>")]
+    return found
+
+def populate(engine, n_articles):
+    rng = random.Random(42)
+    pool = sentences()
+    base = datetime(2024, 1, 1)
+
+    def body(n_sentences):
+        return " ".join(rng.choice(pool) for _ in range(n_sentences))
+
+    rows = []
+    for i in range(n_articles):
+        content = body(30)
+        rows.append({
+            "title": f"Artículo {i}",
+            "content": content,
+            "original_content": body(20),
+            "url": f"https://example.com/{i}",
+            "source": f"Fuente {i % 20}",
+            "summary": content[:200],
+            "status": "published",
+            "published_at": base + timedelta(minutes=i),
+        })
+    # Plain TEXT, exactly as rows written before compression existed
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO article (title, content, original_content, url, source, summary, status, published_at, created_at) "
+                "VALUES (:title, :content, :original_content, :url, :source, :summary, :status, :published_at, CURRENT_TIMESTAMP)"
+            ),
+            rows,
+        )
+
+def measure(engine, db_path, n_articles):
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+    size_mb = os.path.getsize(db_path) / 1e6
+
+    list_ms = []
+    with Session(engine) as session:
+        cursor = None
+        for _ in range(20):
+            start = time.perf_counter()
+            rows, cursor = query_article_page(session, "published", 50, cursor, parse_fields("list"))
+            jsonable_encoder(rows)
+            list_ms.append((time.perf_counter() - start) * 1000)
+
+    rng = random.Random(7)
+    detail_ms = []
+    for article_id in rng.sample(range(1, n_articles + 1), 200):
+        start = time.perf_counter()
+        with Session(engine) as session:
+            jsonable_encoder(session.get(Article, article_id))
+        detail_ms.append((time.perf_counter() - start) * 1000)
+
+    return size_mb, sum(list_ms) / len(list_ms), sorted(detail_ms)[len(detail_ms) // 2]
+
+def main():
+    n_articles = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    codec = "zstd" if compression.zstandard is not None else "zlib"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        compression.COMPRESSION_DICT_DIR = os.path.join(tmp, "dicts")
+        engine = create_engine(f"sqlite:///{db_path}")
+        database.engine = engine
+        database.create_db_and_tables()
+        populate(engine, n_articles)
+
+        results = [("plain TEXT (before)", measure(engine, db_path, n_articles))]
+
+        with engine.begin() as conn:
+            recompress_article_bodies(conn)
+        results.append((codec, measure(engine, db_path, n_articles)))
+
+        if compression.zstandard is not None:
+            with Session(engine) as session:
+                sample = session.exec(text("SELECT id FROM article LIMIT 2000")).all()
+                samples = []
+                for (article_id,) in sample:
+                    article = session.get(Article, article_id)
+                    samples += [article.content, article.original_content]
+            compression.train_dictionary(samples)
+            with engine.begin() as conn:
+                recompress_article_bodies(conn)
+            results.append(("zstd + dictionary", measure(engine, db_path, n_articles)))
+        engine.dispose()
+
+    print(f"{n_articles} articles")
+    base_size = results[0][1][0]
+    for name, (size_mb, list_ms, detail_ms) in results:
+        print(
+            f"{name:20} db {size_mb:7.2f}MB ({size_mb / base_size:4.0%}) | "
+            f"list page (50): {list_ms:6.2f}ms | detail p50: {detail_ms:6.3f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
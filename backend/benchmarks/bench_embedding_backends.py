@@ -0,0 +1,121 @@
+"""
+Embedding backends compared on CPU: PyTorch (before), ONNX Runtime fp32 and
+ONNX Runtime int8 (dynamic quantization).
+
+For each backend, in a fresh process so memory numbers don't mix:
+- load: model load time and resident memory added by the model
+- single query: latency of encode([query]), as /search does per batch of one
+- bulk: texts/s encoding the corpus in batches of 64, as indexing does
+- equivalence: cosine similarity to the PyTorch embeddings of the same texts,
+  and agreement on each text's 10 nearest neighbours
+
+Texts come from the RSS/HTML fixtures. The ONNX backends need
+`pip install "sentence-transformers[onnx]"`.
+
+Run from backend/:
+    python -m benchmarks.bench_embedding_backends [--backends torch onnx onnx-int8] [--queries 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from app.services.embedding_model import BACKENDS, cosine_agreement, neighbour_overlap
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def corpus():
+    from benchmarks.bench_compression import sentences
+    return sentences()
+
+def run_backend(backend: str, n_queries: int, output: str):
+    from app.services import embedding_model
+
+    if backend != "torch" and not embedding_model._onnx_available():
+        sys.exit(f"{backend} needs optimum and onnxruntime: pip install \"sentence-transformers[onnx]\"")
+    texts = corpus()
+    before = rss_mb()
+    start = time.perf_counter()
+    model = embedding_model.load_model(backend)
+    load_s = time.perf_counter() - start
+    model.encode(["warm up"])
+    memory_mb = rss_mb() - before
+
+    single = []
+    for query in texts[:n_queries]:
+        start = time.perf_counter()
+        model.encode([query])
+        single.append((time.perf_counter() - start) * 1000)
+    single.sort()
+
+    start = time.perf_counter()
+    embeddings = np.asarray(model.encode(texts, batch_size=64), dtype="float32")
+    bulk_s = time.perf_counter() - start
+
+    np.save(output, embeddings)
+    print(json.dumps({
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "memory_mb": round(memory_mb, 1),
+        "single_p50_ms": round(single[len(single) // 2], 2),
+        "single_p95_ms": round(single[min(len(single) - 1, int(len(single) * 0.95))], 2),
+        "bulk_texts_per_s": round(len(texts) / bulk_s, 1),
+        "texts": len(texts),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--queries", type=int, default=200, help="single-query encodes per backend")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_backend(args.worker, args.queries, args.output)
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            output = os.path.join(tmp, f"{backend}.npy")
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_embedding_backends", "--worker", backend, "--output", output, "--queries", str(args.queries)],
+                capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                print(f"{backend}: failed\n{completed.stderr[-2000:]}")
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+            results[backend]["embeddings"] = np.load(output)
+
+    if not results:
+        return
+    reference = results.get("torch", {}).get("embeddings")
+    print(f"{next(iter(results.values()))['texts']} texts, {args.queries} single queries")
+    for backend, r in results.items():
+        line = (
+            f"{backend:10} load {r['load_s']:5.2f}s | +{r['memory_mb']:6.1f}MB | "
+            f"single p50 {r['single_p50_ms']:6.2f}ms p95 {r['single_p95_ms']:6.2f}ms | "
+            f"bulk {r['bulk_texts_per_s']:7.1f} texts/s"
+        )
+        if reference is not None and backend != "torch":
+            cosine = cosine_agreement(reference, r["embeddings"])
+            line += f" | cosine mean {cosine.mean():.4f} min {cosine.min():.4f} | top-10 overlap {neighbour_overlap(reference, r['embeddings']):.3f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
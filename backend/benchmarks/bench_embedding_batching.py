@@ -0,0 +1,90 @@
+"""
+Search query encoding under concurrency: one model.encode([query]) per
+request on the CPU pool (before) vs the micro-batching embedding executor.
+
+N clients each encode --queries queries back to back, for N in --clients;
+reports throughput, per-query latency and the mean batch size.
+
+Run from backend/:
+    python -m benchmarks.bench_embedding_batching [--clients 1 8 64] [--queries 50]
+    python -m benchmarks.bench_embedding_batching --simulated   # no model weights needed
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from benchmarks import fakes
+from app.services.embedder import BatchingEncoder
+from app.services.executors import run_cpu
+
+WORDS = "agua litio glaciar salar cuenca energía minería sequía río bosque incendio costa humedal comunidad".split()
+
+def queries(n: int, rng: random.Random):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))) for _ in range(n)]
+
+async def run_clients(encode, n_clients: int, n_queries: int):
+    rng = random.Random(n_clients)
+    latencies = []
+
+    async def client():
+        for query in queries(n_queries, rng):
+            start = time.perf_counter()
+            await encode(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(n_clients)))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "qps": len(ordered) / elapsed,
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "mean_ms": statistics.fmean(ordered),
+    }
+
+class CountingModel:
+    """
+    Records the batch sizes the executor sends to the wrapped model.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.batches = []
+
+    def encode(self, sentences, **kwargs):
+        self.batches.append(len(sentences))
+        return self.model.encode(sentences, **kwargs)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64], help="concurrent clients")
+    parser.add_argument("--queries", type=int, default=50, help="queries per client")
+    parser.add_argument("--simulated", action="store_true", help="fixed-cost simulated model instead of all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    if args.simulated:
+        model = fakes.SimulatedModel()
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+    model.encode(["warm up"])
+
+    for n_clients in args.clients:
+        async def unbatched(query):
+            # Previous /search behaviour
+            return await run_cpu(model.encode, [query])
+        before = await run_clients(unbatched, n_clients, args.queries)
+
+        counting = CountingModel(model)
+        encoder = BatchingEncoder(counting)
+        after = await run_clients(lambda query: encoder.encode_async([query]), n_clients, args.queries)
+        mean_batch = statistics.fmean(counting.batches)
+
+        print(f"{n_clients} client(s), {n_clients * args.queries} queries")
+        for name, r in (("per-request encode", before), ("micro-batched", after)):
+            print(f"  {name:20} {r['qps']:8.1f} q/s | p50 {r['p50_ms']:7.2f}ms | p95 {r['p95_ms']:7.2f}ms")
+        print(f"  mean batch size {mean_batch:.1f}, throughput x{after['qps'] / before['qps']:.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Knowledge base suggestions: legacy full-table scan vs tag table + FTS5.
+
+Run from backend/:
+    python -m benchmarks.bench_knowledge_suggestions [n_items]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session, create_engine, select
+from app.models import KnowledgeItem
+from app.services.knowledge import setup_knowledge_search, suggest_knowledge_items
+
+WORDS = (
+    "agua energía solar minería litio bosque glaciar sequía reciclaje carbono "
+    "emisiones biodiversidad océano pesca agricultura suelo ciudad transporte "
+    "hidrógeno eólica comunidad indígena ley congreso empresa inversión"
+).split()
+TAGS = WORDS[:15]
+QUERIES = [("agua", ""), ("", "glaciar"), ("litio,minería", "inversión"), ("", "hidró"), ("océano", "pesca")]
+
+def legacy_suggestions(session, tags, query):
+    # Previous endpoint body (with the None-tags crash patched), kept as the baseline
+    results = session.exec(select(KnowledgeItem)).all()
+    suggestions = []
+    search_tags = [t.strip().lower() for t in tags.split(",") if t.strip()]
+    for item in results:
+        item_tags = [t.strip().lower() for t in (item.tags or "").split(",") if t.strip()]
+        if search_tags and any(t in item_tags for t in search_tags):
+            suggestions.append(item)
+            continue
+        if query and query.lower() in item.content.lower():
+            suggestions.append(item)
+            continue
+    return suggestions
+
+def populate(engine, n_items):
+    rng = random.Random(42)
+    rows = [
+        {
+            "content": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "tags": ",".join(rng.sample(TAGS, 3)),
+        }
+        for _ in range(n_items)
+    ]
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO knowledgeitem (content, tags, created_at) VALUES (:content, :tags, CURRENT_TIMESTAMP)"),
+            rows,
+        )
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        populate(engine, n_items)
+
+        start = time.perf_counter()
+        setup_knowledge_search(engine)
+        print(f"Backfill of FTS5 index and tag table for {n_items} items: {time.perf_counter() - start:.1f}s")
+
+        with Session(engine) as session:
+            for tags, query in QUERIES:
+                legacy_ms = timed(lambda: legacy_suggestions(session, tags, query), repeat=2)
+                indexed_ms = timed(lambda: suggest_knowledge_items(session, tags=tags, query=query, limit=20))
+                print(f"tags={tags!r:18} query={query!r:12} legacy={legacy_ms:9.1f}ms indexed={indexed_ms:7.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Login throughput and event-loop stall: argon2 verify inline vs on the hashing pool.
+
+Simulates N concurrent /token calls inside one event loop while a ticker task
+measures how late the loop wakes up (what every other request would feel).
+Run from backend/:
+    python -m benchmarks.bench_login [concurrent_logins]
+"""
+import asyncio
+import sys
+import time
+from app.auth import get_password_hash, verify_password, verify_password_async
+
+async def measure(login, n_logins):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(n_logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return n_logins / elapsed, max(lags) * 1000
+
+async def main():
+    n_logins = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    hashed = get_password_hash("admin123")
+
+    async def inline_login():
+        # Previous /token behaviour: async def calling argon2 directly
+        return verify_password("admin123", hashed)
+
+    async def pooled_login():
+        return await verify_password_async("admin123", hashed)
+
+    for label, login in (("inline", inline_login), ("pooled", pooled_login)):
+        throughput, max_lag_ms = await measure(login, n_logins)
+        print(f"{label}: {throughput:7.1f} logins/s, max event loop stall {max_lag_ms:8.1f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
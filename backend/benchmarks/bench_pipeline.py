@@ -0,0 +1,255 @@
+"""
+Offline benchmark suite for the ingestion-to-search pipeline.
+
+Runs against local fixtures only (benchmarks/fixtures/rss and /html) with a
+fake LLM and translator, in a throwaway working directory, and emits the
+results as JSON so runs can be compared across commits:
+
+- ingest: parse_rss_feed throughput over the fixture feeds
+- scrape_parse: scrape_url's HTML extraction time per page
+- vector_index: index_article and search_similar latency as the corpus grows
+- api: GET /articles and GET /search latency through a TestClient
+
+Run from backend/:
+    python -m benchmarks.bench_pipeline [--sizes 1000 5000] [--output results.json]
+    python -m benchmarks.bench_pipeline --fake-embeddings      # no model weights needed
+    python -m benchmarks.bench_pipeline --compare base.json new.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import fakes
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(BENCH_DIR, "fixtures")
+# Slower by more than this fraction is reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.10
+
+def latency(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000, result
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+# --- Stages ---
+
+def bench_ingest(parse_rss_feed):
+    feeds = sorted(glob.glob(os.path.join(FIXTURES, "rss", "*.xml")))
+    per_feed = {}
+    total_entries = 0
+    total_ms = 0.0
+    for path in feeds:
+        ms, created = timed(parse_rss_feed, path, os.path.basename(path))
+        per_feed[os.path.basename(path)] = {"articles": created, "ms": round(ms, 1)}
+        total_entries += created
+        total_ms += ms
+    return {
+        "feeds": per_feed,
+        "articles": total_entries,
+        "articles_per_second": round(total_entries / (total_ms / 1000), 2) if total_ms else 0.0,
+    }
+
+def bench_scrape_parse(extract_text, repeat):
+    pages = [open(p, "rb").read() for p in sorted(glob.glob(os.path.join(FIXTURES, "html", "*.html")))]
+    samples = []
+    for _ in range(repeat):
+        for html in pages:
+            samples.append(timed(extract_text, html)[0])
+    return {"pages": len(pages), **latency(samples)}
+
+def bench_vector_index(rag, Article, sizes, queries):
+    rng = random.Random(42)
+    words = " ".join(queries).split()
+    results = {}
+    next_id = 1_000_000 # Synthetic ids, clear of the ingested articles
+
+    def synthetic(n):
+        nonlocal next_id
+        articles = []
+        for _ in range(n):
+            articles.append(Article(
+                id=next_id, title=" ".join(rng.sample(words, 8)), summary=" ".join(rng.sample(words, 30)),
+                content="", url=f"https://bench.example/{next_id}", source="bench",
+            ))
+            next_id += 1
+        return articles
+
+    for size in sorted(sizes):
+        missing = size - rag.index.ntotal
+        fill_ms = 0.0
+        if missing > 0:
+            fill_ms, _ = timed(rag.index_articles, synthetic(missing))
+        index_samples = [timed(rag.index_article, a)[0] for a in synthetic(20)]
+        search_samples = [timed(rag.search_similar, q, 5)[0] for q in queries]
+        results[str(size)] = {
+            "corpus": rag.index.ntotal,
+            "batch_fill_ms": round(fill_ms, 1),
+            "index_article": latency(index_samples),
+            "search_similar": latency(search_samples),
+        }
+    return results
+
+def bench_api(main, queries, repeat):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import update
+    from sqlmodel import Session
+    from app.cache import invalidate_lists, response_cache
+    from app.database import engine
+    from app.models import Article
+
+    # Ingestion creates drafts, which the anonymous list doesn't show; publish
+    # them so the list timings cover a full page rather than an empty one
+    with Session(engine) as session:
+        session.execute(update(Article).values(status="published"))
+        session.commit()
+    invalidate_lists()
+
+    def clear_cache():
+        response_cache.evict(lambda key: True)
+
+    with TestClient(main.app) as client:
+        def get(url):
+            return timed(client.get, url)[0]
+
+        results = {}
+        page = client.get("/articles?limit=50") # warm-up
+        results["articles_page_size"] = len(page.json())
+        results["articles_cached"] = latency([get("/articles?limit=50") for _ in range(repeat)])
+        uncached = []
+        for _ in range(repeat):
+            clear_cache()
+            uncached.append(get("/articles?limit=50"))
+        results["articles_uncached"] = latency(uncached)
+        results["search"] = latency([get(f"/search?query={q}&limit=5") for q in queries])
+    return results
+
+# --- Comparison ---
+
+def _flatten(data, prefix=""):
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, path + ".")
+        elif isinstance(value, (int, float)):
+            yield path, value
+
+def compare(base_path, new_path):
+    with open(base_path) as f:
+        base = dict(_flatten(json.load(f)["results"]))
+    with open(new_path) as f:
+        new = dict(_flatten(json.load(f)["results"]))
+
+    regressions = 0
+    for path in sorted(base.keys() & new.keys()):
+        if not path.endswith("_ms") or not base[path]:
+            continue
+        change = (new[path] - base[path]) / base[path]
+        flag = ""
+        if change > REGRESSION_THRESHOLD:
+            flag = "  <-- slower"
+            regressions += 1
+        print(f"{path:55} {base[path]:10.3f} -> {new[path]:10.3f}ms {change:+7.1%}{flag}")
+    print(f"{regressions} timing(s) regressed by more than {REGRESSION_THRESHOLD:.0%}")
+
+# --- Main ---
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000], help="FAISS corpus sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="repetitions for per-request timings")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated Gemini latency per article")
+    parser.add_argument("--fake-embeddings", action="store_true", help="hashing encoder instead of all-MiniLM-L6-v2")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # The app keeps its database, FAISS files and page cache in the working directory
+    workdir = tempfile.mkdtemp(prefix="raiz-bench-")
+    os.environ["DATABASE_FILE"] = os.path.join(workdir, "bench.db")
+    os.environ["PAGE_CACHE_DIR"] = os.path.join(workdir, "page_cache")
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(workdir)
+    if args.fake_embeddings:
+        fakes.install_hashing_encoder()
+
+    import main as app_main
+    from app.database import create_db_and_tables
+    from app.models import Article
+    from app.services import ingestion, rag
+    from app.services.scraper import extract_text
+
+    fakes.patch_ingestion(ingestion, args.llm_latency_ms)
+    create_db_and_tables()
+
+    queries = [
+        "lithium mining water rights", "glacier protection law", "drought emergency in Chile",
+        "green hydrogen investment", "salmon farms and coastal pollution", "carbon tax proposal",
+        "indigenous communities consultation", "desalination plant approval", "battery storage tender",
+        "river protection rules", "solar energy in the Atacama", "oil spill cleanup",
+    ]
+
+    started = time.perf_counter()
+    results = {}
+    results["ingest"] = bench_ingest(ingestion.parse_rss_feed)
+    results["scrape_parse"] = bench_scrape_parse(extract_text, args.repeat)
+    results["vector_index"] = bench_vector_index(rag, Article, args.sizes, queries)
+    results["api"] = bench_api(app_main, queries, args.repeat)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "llm_latency_ms": args.llm_latency_ms,
+            "embeddings": "hashing" if args.fake_embeddings else "all-MiniLM-L6-v2",
+        },
+        "duration_seconds": round(time.perf_counter() - started, 1),
+        "results": results,
+    }
+    os.chdir(BENCH_DIR)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+        print(f"Results written to {output}", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+HTML parsing: previous extraction (html.parser, every <p>) vs main-content
+extraction on lxml, over a corpus of saved pages.
+
+Run from backend/:
+    python -m benchmarks.bench_scraper_parse [corpus_dir] [repeat]
+"""
+import glob
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+from app.services.scraper import extract_text
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+def legacy_extract_text(html: bytes) -> str:
+    # Previous scrape_url parsing, kept as the baseline
+    soup = BeautifulSoup(html, 'html.parser')
+    paragraphs = soup.find_all('p')
+    return "\n\n".join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
+
+def run(extract, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [extract(html) for html in pages]
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (repeat * len(pages)), sum(len(o) for o in outputs)
+
+def main():
+    corpus = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    paths = sorted(glob.glob(os.path.join(corpus, "*.html")))
+    if not paths:
+        sys.exit(f"No .html files in {corpus}")
+    pages = [open(p, "rb").read() for p in paths]
+
+    legacy_ms, legacy_chars = run(legacy_extract_text, pages, repeat)
+    new_ms, new_chars = run(extract_text, pages, repeat)
+
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / 1024:.0f}KB of HTML")
+    print(f"legacy (html.parser, all <p>): {legacy_ms:7.2f}ms/page, {legacy_chars} chars extracted")
+    print(f"main content (lxml):           {new_ms:7.2f}ms/page, {new_chars} chars extracted")
+    print(f"text sent to the LLM: {100 * new_chars / max(legacy_chars, 1):.0f}% of legacy")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Concurrent read/write throughput: default engine vs tuned engine (WAL, pragmas, pool).
+
+Readers run the GET /articles list query while one writer inserts and commits
+articles like ingestion does. Run from backend/:
+    python -m benchmarks.bench_sqlite_concurrency [readers] [seconds]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import text
+from sqlmodel import SQLModel, Session
+from app.database import build_engine
+from app.models import Article
+from app.pagination import ARTICLE_LIST_FIELDS, query_article_page
+
+SEED_ARTICLES = 20_000
+
+def seed(engine):
+    body = "Lorem ipsum dolor sit amet. " * 100
+    rows = [
+        {"title": f"Seed {i}", "content": body, "url": f"https://example.com/seed/{i}", "source": "Seed", "status": "published", "published_at": datetime(2024, 1, 1)}
+        for i in range(SEED_ARTICLES)
+    ]
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO article (title, content, url, source, status, published_at, created_at) VALUES (:title, :content, :url, :source, :status, :published_at, CURRENT_TIMESTAMP)"),
+            rows,
+        )
+
+def run(engine, readers, seconds):
+    stop = time.perf_counter() + seconds
+    reads = [0] * readers
+    writes = [0]
+    errors = [0]
+
+    def reader(slot):
+        while time.perf_counter() < stop:
+            try:
+                with Session(engine) as session:
+                    query_article_page(session, "published", 50, None, ARTICLE_LIST_FIELDS)
+                reads[slot] += 1
+            except Exception:
+                errors[0] += 1
+
+    def writer():
+        i = 0
+        while time.perf_counter() < stop:
+            try:
+                with Session(engine) as session:
+                    session.add(Article(title=f"New {i}", content="x" * 2000, url=f"https://example.com/new/{i}/{time.time_ns()}", source="Bench", status="draft"))
+                    session.commit()
+                writes[0] += 1
+            except Exception:
+                errors[0] += 1
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)] + [threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return sum(reads) / seconds, writes[0] / seconds, errors[0]
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    for tuned in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", tuned=tuned)
+            SQLModel.metadata.create_all(engine)
+            seed(engine)
+            reads_per_s, writes_per_s, errors = run(engine, readers, seconds)
+            label = "tuned  " if tuned else "default"
+            print(f"{label} readers={readers}: {reads_per_s:8.1f} reads/s {writes_per_s:7.1f} commits/s errors={errors}")
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Offline stand-ins for the external services in the ingestion pipeline
+(Gemini, Google Translate and, optionally, the sentence-transformers model),
+so benchmark runs are reproducible and never touch the network.
+"""
+import hashlib
+import threading
+import time
+import numpy as np
+
+class FakeTranslator:
+    """
+    Drop-in for deep_translator.GoogleTranslator: returns the text unchanged.
+    """
+    def __init__(self, source="auto", target="es"):
+        self.target = target
+
+    def translate(self, text):
+        return text
+
+def fake_llm(latency_ms: float = 0.0):
+    """
+    Returns a generate_article_content replacement with a fixed simulated
+    latency and a deterministic response of realistic size.
+    """
+    def generate_article_content(title: str, summary: str, source_text: str = "") -> dict:
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        words = [w.strip(".,'").lower() for w in title.split() if len(w) > 5]
+        return {
+            "title": f"{title} (ES)",
+            "content": "\n\n".join([summary] * 4),
+            "tags": words[:3],
+        }
+    return generate_article_content
+
+class HashingEncoder:
+    """
+    Deterministic bag-of-words encoder with the SentenceTransformer.encode
+    interface, for machines without the all-MiniLM-L6-v2 weights. Latency
+    numbers taken with it exclude model inference.
+    """
+    dim = 384
+
+    def __init__(self, *args, **kwargs):
+        self._cache = {}
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        vector = self._cache.get(word)
+        if vector is None:
+            seed = int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16)
+            vector = self._cache[word] = np.random.default_rng(seed).standard_normal(self.dim).astype("float32")
+        return vector
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        vectors = np.zeros((len(sentences), self.dim), dtype="float32")
+        for i, sentence in enumerate(sentences):
+            for word in sentence.lower().split():
+                vectors[i] += self._word_vector(word)
+            if not vectors[i].any():
+                vectors[i, 0] = 1.0
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+def install_hashing_encoder():
+    # Must run before app.services.rag is imported, which loads the model at import time
+    import sentence_transformers
+    sentence_transformers.SentenceTransformer = HashingEncoder
+
+def patch_ingestion(ingestion_module, llm_latency_ms: float = 0.0):
+    ingestion_module.generate_article_content = fake_llm(llm_latency_ms)
+    ingestion_module.GoogleTranslator = FakeTranslator
+
+class SimulatedModel:
+    """
+    Encoder whose cost is a fixed per-call overhead plus a per-text cost,
+    roughly the shape of a CPU transformer forward pass. Sleeps (releasing
+    the GIL, as torch does) so batching effects show without model weights.
+    A forward pass uses every core, so concurrent calls run one at a time.
+    """
+    dim = 384
+
+    def __init__(self, call_overhead_ms: float = 6.0, per_text_ms: float = 0.4):
+        self.call_overhead = call_overhead_ms / 1000
+        self.per_text = per_text_ms / 1000
+        self._hashing = HashingEncoder()
+        self._cpu = threading.Lock()
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        with self._cpu:
+            time.sleep(self.call_overhead + self.per_text * len(sentences))
+        return self._hashing.encode(sentences, normalize_embeddings=normalize_embeddings)
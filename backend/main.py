@@ -1,5 +1,5 @@
 from typing import List, Optional
-from datetime import timedelta
+from datetime import datetime, timedelta
 import os
 import asyncio
 import sys
@@ -9,18 +9,41 @@ if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import update
 from sqlmodel import Session, select
 from pydantic import BaseModel
-from app.models import User, Article, Source, KnowledgeItem, FeedHistory
+from app.models import User, Article, Source, KnowledgeItem, FeedHistory, StoryCluster, StoryClusterMember, RelatedArticle, ArticleRevision, ArchivedArticle
 
-from app.database import create_db_and_tables, get_session
+from app.database import create_db_and_tables, get_session, get_async_session, engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models import User, Article, Source, KnowledgeItem
-from app.auth import verify_password, create_access_token, get_current_user, get_optional_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
-from app.services.ingestion import parse_rss_feed
-from app.services.rag import search_similar
+from app.auth import verify_password_async, get_password_hash_async, create_access_token, get_current_user, get_optional_current_user, invalidate_user_cache, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.services.ingestion import parse_rss_feed_async
+from app.services.executors import run_cpu
+from app.services.http_client import close_http_client
+from app.services.llm import generate_article_content_async, refine_article_content_async, audit_article_content_async
+from app.services.admission import AdmissionRejected, llm_admission
+from app.services.events import publish_article_event, stream_events, close_subscribers
+from app.services.scraper import scrape_url_async
+from app.services.article_ops import ARTICLE_STATUSES, apply_generated, apply_scraped, delete_articles
+from app.services.scheduler import POLL_SCHEDULER_ENABLED, start_scheduler, stop_scheduler, schedule_snapshot, POLL_BUDGET, POLL_TICK_SECONDS
+from app.services.jobs import start_article_job, start_draft_scrape_job, get_job
+from app.services.revisions import set_revision_action, list_revisions, reconstruct, diff_revisions, restore_fields
+from app.pagination import parse_fields, query_article_page
+from app.metrics import metrics_middleware, render_metrics
+from app.profiler import profiler, PROFILER_ENABLED
+from app.services.publisher import STATIC_PUBLISH_ENABLED, STATIC_PUBLISH_DIR, start_publisher, schedule_publish
+from app.cache import on_article_invalidated, cached_json_response, list_validators, article_validators, invalidate_article, response_cache, PRIVATE_CACHE_CONTROL
+from app.services.rag import search_similar_async, remove_articles, archive_vectors
+from app.services.archive import archive_articles, restore_articles, restore_vectors, sweep as sweep_archive
+from app.services.tags import sync_article_tags, tag_facets
+from app.services.knowledge import setup_knowledge_search, sync_item_tags, suggest_knowledge_items
+from app.services.knowledge_rag import index_knowledge_items, backfill_knowledge_index, search_knowledge
 
 load_dotenv()
 
@@ -33,11 +56,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
+# Registered last so it is the outermost layer and times the whole request
+app.middleware("http")(metrics_middleware)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    # LLM pool overloaded: tell the client to back off instead of holding the request
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers={"Retry-After": str(exc.retry_after)})
+
+if STATIC_PUBLISH_ENABLED:
+    # Dev convenience; in production the frontend or a CDN serves the directory
+    app.mount("/static", StaticFiles(directory=STATIC_PUBLISH_DIR, check_dir=False), name="static")
 
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+    # Archived rows/vectors still in the hot tier (first start after upgrading)
+    sweep_archive()
+    setup_knowledge_search(engine)
+    with Session(engine) as session:
+        backfill_knowledge_index(session)
+
+@app.on_event("startup")
+async def on_startup_scheduler():
+    if POLL_SCHEDULER_ENABLED:
+        start_scheduler()
+    if STATIC_PUBLISH_ENABLED:
+        on_article_invalidated(schedule_publish)
+        start_publisher()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    close_subscribers()
+    await stop_scheduler()
+    await close_http_client()
 
 @app.get("/")
 def read_root():
@@ -52,9 +106,10 @@ class IngestRequest(BaseModel):
     source_name: str
 
 @app.post("/token")
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.username == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_async_session)):
+    user = (await session.exec(select(User).where(User.username == form_data.username))).first()
+    # argon2 runs on the hashing pool so logins don't block the event loop
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -64,7 +119,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     # Include role in the token payload
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role}, 
+        data={"sub": user.username, "uid": user.id, "role": user.role}, 
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer", "role": user.role}
@@ -74,9 +129,9 @@ class UserCreate(BaseModel):
     password: str
 
 @app.post("/register", status_code=status.HTTP_201_CREATED)
-def register_user(user_create: UserCreate, session: Session = Depends(get_session)):
+async def register_user(user_create: UserCreate, session: AsyncSession = Depends(get_async_session)):
     # Check if user already exists
-    existing_user = session.exec(select(User).where(User.username == user_create.username)).first()
+    existing_user = (await session.exec(select(User).where(User.username == user_create.username))).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -84,13 +139,12 @@ def register_user(user_create: UserCreate, session: Session = Depends(get_sessio
         )
     
     # Create new user
-    from app.auth import get_password_hash
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     new_user = User(username=user_create.username, hashed_password=hashed_password, role="user")
     
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
     
     return {"message": "User created successfully", "username": new_user.username}
 
@@ -121,6 +175,7 @@ def update_user_role(user_id: int, role_update: UserRoleUpdate, session: Session
     session.add(user_to_update)
     session.commit()
     session.refresh(user_to_update)
+    invalidate_user_cache(user_to_update.username)
     return user_to_update
 
 @app.delete("/users/{user_id}")
@@ -135,83 +190,262 @@ def delete_user(user_id: int, session: Session = Depends(get_session), current_u
     if user_to_delete.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
         
+    username = user_to_delete.username
     session.delete(user_to_delete)
     session.commit()
+    invalidate_user_cache(username)
     return {"ok": True}
 
 @app.post("/ingest")
-def ingest_feed(request: IngestRequest, current_user: User = Depends(get_current_user)):
+async def ingest_feed(request: IngestRequest, current_user: User = Depends(get_current_user)):
     try:
-        count = parse_rss_feed(request.feed_url, request.source_name)
+        count = await parse_rss_feed_async(request.feed_url, request.source_name)
         return {"message": "Ingestion successful", "count": count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/articles", response_model=List[Article])
-def get_articles(status: str = "published", session: Session = Depends(get_session), current_user: User = Depends(get_optional_current_user)):
+@app.get("/articles")
+def get_articles(request: Request, response: Response, status: str = "published", tag: Optional[str] = None, limit: Optional[int] = Query(default=None, ge=1, le=200), cursor: Optional[str] = None, fields: Optional[str] = None, archived: bool = False, session: Session = Depends(get_session), current_user: User = Depends(get_optional_current_user)):
+    """
+    Lists articles ordered by published_at/id, newest first.
+    With limit, returns one keyset page and sets X-Next-Cursor when more rows
+    follow; pass it back as cursor. fields= selects columns ("list" for the
+    lightweight dashboard projection); only those columns are queried. The
+    compressed content/original_content bodies are left out unless fields=
+    names them, so a list never decompresses them.
+    tag= filters through the indexed ArticleTag table.
+    archived=true (or status=archived) lists the archive tier instead (admins
+    only); status=all lists both tiers.
+    Anonymous reads are served with ETag/Last-Modified and from the response cache.
+    """
     # Access Control Logic for List
-    if status == "all":
+    if archived or status == "archived":
+        if not current_user or current_user.role != "admin":
+            return []
+        # Archived rows live only in the archive tier
+        archived = True
+        status = "all"
+    elif status == "all":
         if not current_user or current_user.role != "admin":
             return [] # Or raise 403
-        articles = session.exec(select(Article)).all()
-        return articles
-
-    if status != "published":
+    elif status != "published":
         if not current_user or current_user.role != "admin":
             # Return empty list or 403. Returning empty list mimics "no articles found"
             return []
-            
-    articles = session.exec(select(Article).where(Article.status == status)).all()
-    return articles
+
+    try:
+        columns = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def build():
+        try:
+            rows, next_cursor = query_article_page(session, status, limit, cursor, columns, tag=tag, archived=archived, include_archived=status == "all" and not archived)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return rows, ({"X-Next-Cursor": next_cursor} if next_cursor else {})
+
+    if current_user is None:
+        key = ("list", status, tag, limit, cursor, ",".join(columns))
+        return cached_json_response(request, key, list_validators(), build)
+
+    rows, headers = build()
+    response.headers.update(headers)
+    response.headers["Cache-Control"] = PRIVATE_CACHE_CONTROL
+    return rows
 
 @app.get("/articles/{article_id}", response_model=Article)
-def get_article(article_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_optional_current_user)):
-    article = session.get(Article, article_id)
-    if not article:
-        raise HTTPException(status_code=404, detail="Article not found")
-    
-    # Access Control Logic
-    if article.status != "published":
-        # If not published, user must be admin
-        if not current_user or current_user.role != "admin":
-            # Return 404 to hide existence of draft/archived articles
+def get_article(article_id: int, request: Request, response: Response, archived: bool = False, session: Session = Depends(get_session), current_user: User = Depends(get_optional_current_user)):
+    if archived:
+        # Archive tier, admins only
+        article = session.get(ArchivedArticle, article_id) if current_user and current_user.role == "admin" else None
+        if not article:
             raise HTTPException(status_code=404, detail="Article not found")
-            
+        response.headers["Cache-Control"] = PRIVATE_CACHE_CONTROL
+        return article
+
+    def build():
+        article = session.get(Article, article_id)
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+
+        # Access Control Logic
+        if article.status != "published":
+            # If not published, user must be admin
+            if not current_user or current_user.role != "admin":
+                # Return 404 to hide existence of draft/archived articles
+                raise HTTPException(status_code=404, detail="Article not found")
+
+        return article, {}
+
+    if current_user is None:
+        # Only published articles get this far, so a cached entry is always public
+        return cached_json_response(request, ("article", article_id), article_validators(article_id), build)
+
+    article, _ = build()
+    response.headers["Cache-Control"] = PRIVATE_CACHE_CONTROL
     return article
 
 class ArticleUpdate(BaseModel):
     title: str
     summary: str
     status: str
+    tags: Optional[str] = None
 
-@app.put("/articles/{article_id}", response_model=Article)
-def update_article(article_id: int, article_update: ArticleUpdate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+def _editable_article(session: Session, article_id: int) -> Article:
+    """
+    The live article, or an archived one moved back to the live table (not
+    committed, still with status "archived") so it can be edited. 404 if neither.
+    """
     article = session.get(Article, article_id)
-    if not article:
+    if article is None and restore_articles(session, [article_id], "archived"):
+        article = session.get(Article, article_id)
+    if article is None:
         raise HTTPException(status_code=404, detail="Article not found")
+    return article
+
+@app.put("/articles/{article_id}", response_model=Article)
+def update_article(article_id: int, article_update: ArticleUpdate, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    article = _editable_article(session, article_id)
     
+    set_revision_action(session, "edit", current_user.username)
+    previous_status = article.status
     article.title = article_update.title
     article.summary = article_update.summary
     article.status = article_update.status
+    if article_update.tags is not None:
+        article.tags = article_update.tags
+        sync_article_tags(session, article)
     
     session.add(article)
     session.commit()
     session.refresh(article)
+
+    if article.status == "archived":
+        # Move to the archive tier; the detached copy is still returned
+        session.expunge(article)
+        archive_articles(session, [article_id])
+        session.commit()
+        archive_vectors([article_id])
+    elif previous_status == "archived":
+        # Unarchived: its vector goes back to the live index
+        restore_vectors([article_id])
+    invalidate_article(article_id)
+    publish_article_event("status" if article.status != previous_status else "updated", article_id, article.status, article.title)
     
     # Re-index in RAG if needed (omitted for MVP simplicity, or we can update metadata)
     
     return article
 
+@app.get("/tags")
+def get_tag_facets(status: Optional[str] = None, limit: int = Query(default=100, ge=1, le=1000), session: Session = Depends(get_session), current_user: User = Depends(get_optional_current_user)):
+    """
+    Article counts per tag and status. Non-admins only see published counts.
+    """
+    if not current_user or current_user.role != "admin":
+        status = "published"
+    return tag_facets(session, status=status, limit=limit)
+
+@app.get("/cache/stats")
+def get_cache_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return response_cache.stats()
+
+@app.get("/events")
+async def article_events(request: Request, access_token: Optional[str] = None, current_user: Optional[User] = Depends(get_optional_current_user)):
+    """
+    Server-Sent Events stream of article changes (created, updated, status,
+    deleted). EventSource can't send an Authorization header, so the token
+    may also be passed as ?access_token=. Drafts are only visible to admins.
+    """
+    if current_user is None and access_token:
+        current_user = await get_optional_current_user(access_token)
+    admin = current_user is not None and current_user.role == "admin"
+    return StreamingResponse(
+        stream_events(admin, request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        # No proxy buffering, or events arrive in bursts
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/llm/admission")
+def get_llm_admission(current_user: User = Depends(get_current_user)):
+    """
+    Gemini slots in use and queued calls per priority class.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return llm_admission.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Route latency histograms, stage timings (db.query, embedding.encode,
+    faiss.*, scraper.*, llm.*), LLM admission queues and response cache
+    counters in the Prometheus text format.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def require_profiler_admin(current_user: User = Depends(get_current_user)) -> User:
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled (set PROFILER_ENABLED=1)")
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return current_user
+
+@app.post("/debug/profiler/start")
+def start_profiler(interval_ms: float = Query(5.0, ge=1.0, le=1000.0), current_user: User = Depends(require_profiler_admin)):
+    try:
+        profiler.start(interval_ms)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"running": True, "interval_ms": interval_ms}
+
+@app.post("/debug/profiler/stop")
+def stop_profiler(current_user: User = Depends(require_profiler_admin)):
+    profiler.stop()
+    return profiler.summary()
+
+@app.get("/debug/profiler")
+def get_profile(format: str = "json", current_user: User = Depends(require_profiler_admin)):
+    """
+    Current samples: a top-functions summary, or format=collapsed for
+    flamegraph.pl / speedscope.
+    """
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return profiler.summary()
+
 @app.get("/search")
-def search_articles(query: str, limit: int = 5):
-    results = search_similar(query, limit)
+async def search_articles(query: str, limit: int = 5, archived: bool = False, current_user: User = Depends(get_optional_current_user)):
+    # archived=true searches the archive index instead (admins only)
+    if archived and (not current_user or current_user.role != "admin"):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    # The query is encoded in a shared batch with concurrent requests, then
+    # FAISS search runs on the CPU executor, off the event loop
+    results = await search_similar_async(query, limit, archived)
     return results
 
 # --- Source Management ---
 
+@app.get("/scheduler")
+def get_polling_schedule(current_user: User = Depends(get_current_user)):
+    """
+    Learned polling interval, rate and next due time of every source.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return {
+        "enabled": POLL_SCHEDULER_ENABLED,
+        "budget_per_tick": POLL_BUDGET,
+        "tick_seconds": POLL_TICK_SECONDS,
+        "sources": schedule_snapshot(),
+    }
+
 @app.get("/sources", response_model=List[Source])
-def get_sources(session: Session = Depends(get_session)):
-    return session.exec(select(Source)).all()
+async def get_sources(session: AsyncSession = Depends(get_async_session)):
+    return (await session.exec(select(Source))).all()
 
 @app.post("/sources", response_model=Source)
 def create_source(source: Source, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
@@ -230,7 +464,7 @@ def delete_source(source_id: int, session: Session = Depends(get_session), curre
     return {"ok": True}
 
 @app.get("/sources/successful", response_model=List[Source])
-def get_successful_sources(session: Session = Depends(get_session)):
+async def get_successful_sources(session: AsyncSession = Depends(get_async_session)):
     """
     Returns a list of sources that have at least one successful connection in FeedHistory.
     """
@@ -238,7 +472,7 @@ def get_successful_sources(session: Session = Depends(get_session)):
     # Join Source and FeedHistory where status is 'success'
     # Distinct sources
     statement = select(Source).join(FeedHistory).where(FeedHistory.status == "success").distinct()
-    return session.exec(statement).all()
+    return (await session.exec(statement)).all()
 
 class FeedHistoryReadWithSource(BaseModel):
     id: int
@@ -249,12 +483,12 @@ class FeedHistoryReadWithSource(BaseModel):
     details: Optional[str] = None
 
 @app.get("/history/successful", response_model=List[FeedHistoryReadWithSource])
-def get_successful_history(session: Session = Depends(get_session)):
+async def get_successful_history(session: AsyncSession = Depends(get_async_session)):
     """
     Returns a list of successful feed history records, joined with Source to get the name.
     """
     statement = select(FeedHistory, Source.name).join(Source).where(FeedHistory.status == "success").order_by(FeedHistory.fetched_at.desc()).limit(50)
-    results = session.exec(statement).all()
+    results = (await session.exec(statement)).all()
     
     history_list = []
     for history, source_name in results:
@@ -272,70 +506,192 @@ def get_successful_history(session: Session = Depends(get_session)):
 
 @app.delete("/articles/{article_id}")
 def delete_article(article_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    article = session.get(Article, article_id)
-    if not article:
+    if not delete_articles(session, [article_id]):
         raise HTTPException(status_code=404, detail="Article not found")
-    session.delete(article)
     session.commit()
+    remove_articles([article_id])
+    invalidate_article(article_id)
+    publish_article_event("deleted", article_id)
     return {"ok": True}
 
-@app.post("/articles/{article_id}/regenerate")
-def regenerate_article(article_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+class BulkArticleRequest(BaseModel):
+    ids: List[int]
+    action: str # "status", "delete", "regenerate", "scrape"
+    status: Optional[str] = None # Target status for action="status"
+
+@app.post("/articles/bulk")
+async def bulk_article_action(request: BulkArticleRequest, response: Response, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
+    """
+    Applies one action to many articles. Status changes and deletes run in a
+    single transaction; regenerate and scrape start a background job whose
+    progress is available at GET /jobs/{job_id}.
+    """
+    ids = list(dict.fromkeys(request.ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No article ids given")
+
+    if request.action == "status":
+        if request.status not in ARTICLE_STATUSES:
+            raise HTTPException(status_code=400, detail="Invalid status")
+        if request.status == "archived":
+            # Live articles move to the archive tier
+            moved = await session.run_sync(archive_articles, ids)
+            await session.commit()
+            await run_cpu(archive_vectors, moved)
+            changed = list(moved)
+        else:
+            result = await session.execute(update(Article).where(Article.id.in_(ids), Article.status != request.status).values(status=request.status).returning(Article.id))
+            updated_ids = list(result.scalars().all())
+            # Archived articles among the ids move back to the live table
+            restored = await session.run_sync(restore_articles, ids, request.status)
+            await session.commit()
+            await run_cpu(restore_vectors, restored)
+            changed = updated_ids + list(restored)
+        for article_id in ids:
+            invalidate_article(article_id)
+        for article_id in changed:
+            publish_article_event("status", article_id, request.status)
+        return {"action": "status", "affected": len(changed)}
+
+    if request.action == "delete":
+        deleted = await session.run_sync(delete_articles, ids)
+        await session.commit()
+        await run_cpu(remove_articles, deleted)
+        for article_id in deleted:
+            invalidate_article(article_id)
+            publish_article_event("deleted", article_id)
+        return {"action": "delete", "affected": len(deleted)}
+
+    if request.action == "regenerate":
+        async def regenerate(article: Article):
+            # Use current content as source for regeneration
+            generated_data = await generate_article_content_async(article.title, article.summary or article.content, llm_class="bulk")
+            return lambda fresh: apply_generated(fresh, generated_data)
+        job = start_article_job("regenerate", ids, regenerate)
+    elif request.action == "scrape":
+        async def scrape(article: Article):
+            if not article.url:
+                raise ValueError("Article has no URL")
+            scraped_text = await scrape_url_async(article.url)
+            return lambda fresh: apply_scraped(fresh, scraped_text)
+        job = start_article_job("scrape", ids, scrape)
+    else:
+        raise HTTPException(status_code=400, detail="Invalid action")
+
+    response.status_code = status.HTTP_202_ACCEPTED
+    return job
+
+class DraftScrapeRequest(BaseModel):
+    limit: int = 200 # Drafts scraped by one job, newest first
+
+@app.post("/articles/scrape-drafts", status_code=status.HTTP_202_ACCEPTED)
+async def scrape_drafts(request: DraftScrapeRequest, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
+    """
+    Starts a background job that replaces the RSS summary of drafts that were
+    never scraped with the full page text. Progress, per-domain success rates
+    and throughput are available at GET /jobs/{job_id}.
+    """
+    if request.limit < 1 or request.limit > 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    result = await session.execute(
+        select(Article.id, Article.url)
+        .where(Article.status == "draft", Article.scraped_at.is_(None), Article.url != "")
+        .order_by(Article.created_at.desc())
+        .limit(request.limit)
+    )
+    return start_draft_scrape_job([(article_id, url) for article_id, url in result.all()])
+
+@app.get("/jobs/{job_id}")
+def get_job_progress(job_id: str, current_user: User = Depends(get_current_user)):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/articles/{article_id}/related", response_model=List[Article])
+def get_related_articles(article_id: int, limit: int = 5, session: Session = Depends(get_session), current_user: User = Depends(get_optional_current_user)):
+    """
+    Returns the precomputed nearest neighbours of an article (see app.services.related).
+    """
+    is_admin = current_user is not None and current_user.role == "admin"
+
+    statement = select(Article).join(RelatedArticle, RelatedArticle.related_article_id == Article.id).where(RelatedArticle.article_id == article_id)
+    if not is_admin:
+        # Drafts and archived articles are hidden from the public, as in get_article
+        statement = statement.where(Article.status == "published")
+    statement = statement.order_by(RelatedArticle.rank).limit(limit)
+    return session.exec(statement).all()
+
+@app.get("/articles/{article_id}/cluster", response_model=List[StoryClusterMember])
+def get_article_cluster(article_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Returns the near-duplicate entries that were grouped under this article at ingestion.
+    """
     article = session.get(Article, article_id)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
+
+    statement = select(StoryClusterMember).join(StoryCluster).where(StoryCluster.article_id == article_id).order_by(StoryClusterMember.similarity.desc())
+    return session.exec(statement).all()
+
+@app.post("/articles/{article_id}/regenerate")
+async def regenerate_article(article_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
+    article = await session.get(Article, article_id)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
     
     # We need the original source text or at least the summary to regenerate
     # Since we don't store the full original text, we use the current summary/content as context
     # Ideally, we should store the original text in a separate field
     
-    from app.services.llm import generate_article_content
-    
     # Use current content as source for regeneration
-    generated_data = generate_article_content(article.title, article.summary or article.content)
-    
-    article.title = generated_data['title']
-    article.content = generated_data['content']
-    
-    # Generate a better summary or just truncate without "..." if short
-    # Ideally, the LLM should also return a summary
-    if len(generated_data['content']) > 200:
-        article.summary = generated_data['content'][:200] + "..."
-    else:
-        article.summary = generated_data['content']
+    title, source_text = article.title, article.summary or article.content
+    # Release the pooled connection and its read transaction while Gemini
+    # (and the admission queue) runs; the article is reloaded for the write
+    await session.close()
+    generated_data = await generate_article_content_async(title, source_text)
+    article = await session.get(Article, article_id)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    set_revision_action(session, "regenerate", current_user.username)
+    apply_generated(article, generated_data)
     
     session.add(article)
-    session.commit()
-    session.refresh(article)
+    await session.commit()
+    await session.refresh(article)
+    invalidate_article(article_id)
+    publish_article_event("updated", article_id, article.status, article.title)
     
     return article
 
 @app.post("/articles/{article_id}/scrape")
-def scrape_article(article_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    article = session.get(Article, article_id)
+async def scrape_article(article_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
+    article = await session.get(Article, article_id)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     
     if not article.url:
         raise HTTPException(status_code=400, detail="Article has no URL")
         
-    from app.services.scraper import scrape_url
-    
     try:
-        scraped_text = scrape_url(article.url)
-        article.content = scraped_text
-        article.original_content = scraped_text # Save original for reference
-        
-        # Also update summary so the UI card reflects the change
-        if len(scraped_text) > 200:
-            article.summary = scraped_text[:200] + "..."
-        else:
-            article.summary = scraped_text
+        url = article.url
+        # Don't hold the connection across the page fetch
+        await session.close()
+        scraped_text = await scrape_url_async(url)
+        article = await session.get(Article, article_id)
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+        set_revision_action(session, "scrape", current_user.username)
+        apply_scraped(article, scraped_text)
             
         session.add(article)
-        session.commit()
-        session.refresh(article)
+        await session.commit()
+        await session.refresh(article)
+        invalidate_article(article_id)
+        publish_article_event("updated", article_id, article.status, article.title)
         return article
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
 
@@ -344,14 +700,14 @@ class RefineRequest(BaseModel):
     instruction: str
 
 @app.post("/articles/{article_id}/refine")
-def refine_article(article_id: int, request: RefineRequest, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    article = session.get(Article, article_id)
+async def refine_article(article_id: int, request: RefineRequest, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
+    article = await session.get(Article, article_id)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
+    # Nothing else is read; don't hold the connection across the Gemini call
+    await session.close()
         
-    from app.services.llm import refine_article_content
-    
-    refined_content = refine_article_content(request.content, request.instruction)
+    refined_content = await refine_article_content_async(request.content, request.instruction)
     
     # We return the refined content but don't save it automatically? 
     # Or should we save it? The user is in the editor, so they might want to review it first.
@@ -361,55 +717,123 @@ def refine_article(article_id: int, request: RefineRequest, session: Session = D
     return {"refined_content": refined_content}
 
 @app.post("/articles/{article_id}/audit")
-def audit_article(article_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def audit_article(article_id: int, session: AsyncSession = Depends(get_async_session), current_user: User = Depends(get_current_user)):
     print(f"DEBUG: Received audit request for article {article_id}")
-    article = session.get(Article, article_id)
+    article = await session.get(Article, article_id)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
         
-    from app.services.llm import audit_article_content
-    
     # Use original_content if available, otherwise fallback to summary or empty
     reference_content = article.original_content or article.summary or ""
     print(f"DEBUG: Reference content length: {len(reference_content)}")
+    content = article.content
+    # Don't hold the connection across the Gemini call
+    await session.close()
     
-    audit_report = audit_article_content(article.content, reference_content)
+    audit_report = await audit_article_content_async(content, reference_content)
     print(f"DEBUG: Audit report generated. Length: {len(audit_report)}")
     
     return {"audit_report": audit_report}
 
+# --- Revision History Endpoints ---
+
+def _get_revision_state(session: Session, article_id: int, revision: int) -> dict:
+    state = reconstruct(session, article_id, revision)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return state
+
+@app.get("/articles/{article_id}/revisions")
+def get_article_revisions(article_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Revisions of an article's title, summary, content and tags, newest first.
+    Archived articles keep their history.
+    """
+    if not session.get(Article, article_id) and not session.get(ArchivedArticle, article_id):
+        raise HTTPException(status_code=404, detail="Article not found")
+    return list_revisions(session, article_id)
+
+@app.get("/articles/{article_id}/revisions/{revision}")
+def get_article_revision(article_id: int, revision: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    state = _get_revision_state(session, article_id, revision)
+    return {"revision": revision, **state}
+
+@app.get("/articles/{article_id}/revisions/{revision}/diff")
+def diff_article_revision(article_id: int, revision: int, against: Optional[int] = None, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Unified diff per changed field between a revision and `against`
+    (by default the previous revision).
+    """
+    against = against if against is not None else revision - 1
+    new_state = _get_revision_state(session, article_id, revision)
+    old_state = _get_revision_state(session, article_id, against)
+    return {"revision": revision, "against": against, "diff": diff_revisions(old_state, new_state, f"r{against}", f"r{revision}")}
+
+@app.post("/articles/{article_id}/revisions/{revision}/restore", response_model=Article)
+def restore_article_revision(article_id: int, revision: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """
+    Restores the article's title, summary, content and tags to a revision.
+    The restore itself is recorded as a new revision. Archived articles
+    stay archived.
+    """
+    article = _editable_article(session, article_id)
+    state = _get_revision_state(session, article_id, revision)
+
+    set_revision_action(session, "restore", current_user.username)
+    changed = restore_fields(article, state)
+    if not changed:
+        return article
+    if "tags" in changed:
+        sync_article_tags(session, article)
+    session.add(article)
+    session.commit()
+    session.refresh(article)
+    if article.status == "archived":
+        # Back to the archive tier; its vector never left the archive index
+        session.expunge(article)
+        archive_articles(session, [article_id])
+        session.commit()
+    invalidate_article(article_id)
+    publish_article_event("updated", article_id, article.status, article.title)
+    return article
+
 # --- Knowledge Base Endpoints ---
 
 @app.post("/knowledge-base")
 def add_to_knowledge_base(item: KnowledgeItem, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
     session.add(item)
+    session.flush()
+    sync_item_tags(session, item)
     session.commit()
     session.refresh(item)
+
+    try:
+        index_knowledge_items([item])
+    except Exception as e:
+        print(f"Error indexing knowledge item {item.id}: {e}")
+
     return item
 
-@app.get("/knowledge-base/suggestions")
-def get_knowledge_base_suggestions(tags: str = "", query: str = "", session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+@app.get("/knowledge-base/suggestions", response_model=List[KnowledgeItem])
+def get_knowledge_base_suggestions(tags: str = "", query: str = "", article_id: Optional[int] = None, semantic: bool = False, limit: int = 20, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
     """
     Get suggestions from the knowledge base based on tags or query.
-    Simple implementation: matches if any tag overlaps or if query is in content.
+    Lexical by default: matches if any tag overlaps (indexed tag table) or if
+    the query matches the content (FTS5), ranked by shared tags and then text
+    relevance. With article_id or semantic=true, returns the top items closest
+    in embedding space to the article (title + summary) or the free text query.
     """
-    statement = select(KnowledgeItem)
-    results = session.exec(statement).all()
-    
-    suggestions = []
-    search_tags = [t.strip().lower() for t in tags.split(",") if t.strip()]
-    
-    for item in results:
-        item_tags = [t.strip().lower() for t in item.tags.split(",") if t.strip()]
-        
-        # Check for tag overlap
-        if search_tags and any(t in item_tags for t in search_tags):
-            suggestions.append(item)
-            continue
-            
-        # Check for query match
-        if query and query.lower() in item.content.lower():
-            suggestions.append(item)
-            continue
-            
-    return suggestions
+    if article_id is not None or semantic:
+        if article_id is not None:
+            article = session.get(Article, article_id)
+            if not article:
+                raise HTTPException(status_code=404, detail="Article not found")
+            text = f"{article.title}. {article.summary or ''}"
+        else:
+            text = query
+
+        matches = search_knowledge(text, k=limit)
+        items = {item.id: item for item in session.exec(select(KnowledgeItem).where(KnowledgeItem.id.in_([i for i, _ in matches]))).all()}
+        return [items[i] for i, _ in matches if i in items]
+
+    return suggest_knowledge_items(session, tags=tags, query=query, limit=limit)